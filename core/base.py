@@ -3,6 +3,7 @@ import os
 import pkgutil
 import importlib
 import platform
+import selectors
 from pathlib import Path
 from abc import ABC, abstractmethod
 import shutil
@@ -10,7 +11,9 @@ import subprocess
 from typing import List, Optional, Dict, Tuple
 from .terminal_management import TerminalManager
 from .colors import Colors
+from .state_cache import StateCache
 from .ssh_manager import SSHManager, SSHCredentials 
+from .ssh_pool import default_pool
 
 # Añadir el directorio raíz al path si no está ya
 root_dir = Path(__file__).parent.parent
@@ -144,28 +147,43 @@ class GetModule(ABC):
             bool: True si la ejecución fue exitosa, False en caso contrario
         """
         try:
+            # Como root, un sudo delante solo añade otro proceso y una sesión PAM.
+            # Solo se quita si le sigue un programa: opciones y asignaciones VAR=valor
+            # necesitan sudo para interpretarse
+            if (len(cmd) > 1 and cmd[0] == 'sudo' and not cmd[1].startswith('-')
+                    and '=' not in cmd[1] and os.geteuid() == 0):
+                cmd = cmd[1:]
+                
             process = subprocess.Popen(
                 cmd,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
-                universal_newlines=True,
-                bufsize=1
+                bufsize=0
             )
 
-            if show_output:
-                while True:
-                    output = process.stdout.readline()
-                    if output == '' and process.poll() is not None:
-                        break
-                    if output:
-                        print(output.strip())
+            # Leer ambas tuberías a medida que llegan datos: la salida se pasa tal cual
+            # a stdout y stderr se guarda para mostrarlo si el script falla
+            stderr = bytearray()
+            sys.stdout.flush()
+            with selectors.DefaultSelector() as selector:
+                selector.register(process.stdout, selectors.EVENT_READ)
+                selector.register(process.stderr, selectors.EVENT_READ)
+                while selector.get_map():
+                    for key, _ in selector.select():
+                        chunk = os.read(key.fd, 65536)
+                        if not chunk:
+                            selector.unregister(key.fileobj)
+                        elif key.fileobj is process.stderr:
+                            stderr.extend(chunk)
+                        elif show_output:
+                            sys.stdout.buffer.write(chunk)
+                            sys.stdout.buffer.flush()
 
             process.wait()
 
             if process.returncode != 0:
-                stderr = process.stderr.read()
                 if stderr:
-                    print(f"Error: {stderr}")
+                    print(f"Error: {stderr.decode('utf-8', errors='replace')}")
                 return False
                 
             return True
@@ -179,6 +197,35 @@ class GetModule(ABC):
 
 class ToolModule(GetModule):
     modules = {}  # Variable de clase compartida
+    # Instancias creadas por check_module_compatibility, por ruta de fichero,
+    # para que load_modules no vuelva a importar y crear los mismos módulos
+    _checked_modules: Dict[str, 'ToolModule'] = {}
+    # Gestores de paquetes soportados: ruta del binario -> (nombre, comandos)
+    PACKAGE_MANAGERS = {
+        '/usr/bin/apt': ('apt', {
+            'install': 'sudo apt-get install -y',
+            'update': 'sudo apt-get update && sudo apt-get upgrade -y',
+            'remove': 'sudo apt-get remove -y',
+            'autoremove': 'sudo apt-get autoremove -y',
+            'show_cmd': 'apt show'
+        }),
+        '/usr/bin/yum': ('yum', {
+            'install': 'sudo yum install -y',
+            'update': 'sudo yum update -y',
+            'remove': 'sudo yum remove -y',
+            'autoremove': 'sudo yum autoremove -y',
+            'show_cmd': 'yum info'
+        }),
+        '/usr/bin/pacman': ('pacman', {
+            'install': 'sudo pacman -S --noconfirm',
+            'update': 'sudo pacman -Syu --noconfirm',
+            'remove': 'sudo pacman -R --noconfirm',
+            'autoremove': 'sudo pacman -Rns --noconfirm',
+            'show_cmd': 'pacman -Si'
+        })
+    }
+    # Resultado de get_package_manager, el sistema no cambia durante la ejecución
+    _package_manager: Optional[tuple] = None
     
     @classmethod
     def check_module_compatibility(cls) -> dict:
@@ -192,8 +239,9 @@ class ToolModule(GetModule):
             'Compatible': [],
             'Incompatible': []
         }
+        cls._checked_modules = {}
         
-        modules_dir = Path(__file__).parent.parent / 'modules'
+        modules_dir = root_dir / 'modules'
         
         if not modules_dir.exists():
             return compatibility_status
@@ -214,114 +262,107 @@ class ToolModule(GetModule):
             ('run_direct', type(None))
         ]
             
-        def check_directory(directory: Path):
-            """Recursively check modules in directory and subdirectories"""
+        def iter_module_files(directory: Path):
+            """Recursively yield the module files in directory and its subdirectories"""
             if not directory.is_dir():
                 return
+            yield from (file_path for file_path in directory.glob("*.py") if file_path.name != "__init__.py")
+            for subdir in directory.iterdir():
+                if subdir.is_dir() and not subdir.name.startswith('_'):
+                    yield from iter_module_files(subdir)
+
+        def check_file(file_path: Path) -> Tuple[str, object]:
+            """Check a single module file, returning its status key and entry"""
+            try:
+                # Get relative module path
+                rel_path = file_path.relative_to(modules_dir.parent)
+                import_path = str(rel_path.with_suffix('')).replace(os.sep, '.')
                 
-            # Check Python files in current directory
-            for file_path in directory.glob("*.py"):
-                if file_path.name == "__init__.py":
-                    continue
-                    
-                try:
-                    # Get relative module path
-                    rel_path = file_path.relative_to(modules_dir.parent)
-                    import_path = str(rel_path.with_suffix('')).replace(os.sep, '.')
-                    
-                    # Import module
-                    spec = importlib.util.spec_from_file_location(import_path, str(file_path))
-                    if not spec:
-                        raise ImportError("Could not create module spec")
-                    
-                    module = importlib.util.module_from_spec(spec)
-                    sys.modules[import_path] = module
-                    spec.loader.exec_module(module)
-                    
-                    # Look for ToolModule class
-                    found_tool_class = False
-                    for attr_name in dir(module):
-                        attr = getattr(module, attr_name)
-                        if (isinstance(attr, type) and 
-                            issubclass(attr, cls) and 
-                            attr != cls):
-                            found_tool_class = True
+                # Import module
+                spec = importlib.util.spec_from_file_location(import_path, str(file_path))
+                if not spec:
+                    raise ImportError("Could not create module spec")
+                
+                module = importlib.util.module_from_spec(spec)
+                sys.modules[import_path] = module
+                spec.loader.exec_module(module)
+                
+                # Look for ToolModule class
+                for attr_name in dir(module):
+                    attr = getattr(module, attr_name)
+                    if (isinstance(attr, type) and 
+                        issubclass(attr, cls) and 
+                        attr != cls):
+                        
+                        try:
+                            # Check required methods
+                            missing_methods = []
+                            wrong_types = []
                             
-                            try:
-                                # Check required methods
-                                missing_methods = []
-                                wrong_types = []
-                                
-                                # Create instance for method testing
-                                instance = attr()
-                                
-                                # Verify each required method
-                                for method_name, expected_type in required_methods:
-                                    if not hasattr(instance, method_name):
-                                        missing_methods.append(method_name)
-                                        continue
-                                        
-                                    method = getattr(instance, method_name)
-                                    if not callable(method):
-                                        missing_methods.append(method_name)
-                                        continue
+                            # Create instance for method testing
+                            instance = attr()
+                            
+                            # Verify each required method
+                            for method_name, expected_type in required_methods:
+                                if not hasattr(instance, method_name):
+                                    missing_methods.append(method_name)
+                                    continue
                                     
-                                    # Check return type if method is not run_guided or run_direct
-                                    if method_name not in ['run_guided', 'run_direct']:
-                                        try:
-                                            # Special handling for command methods that need pkg_manager argument
-                                            if method_name in ['_get_update_command', '_get_install_command', '_get_uninstall_command']:
-                                                result = method('apt')  # Use 'apt' as a test value
-                                            else:
-                                                result = method()
-                                                
-                                            if isinstance(expected_type, tuple):
-                                                if not isinstance(result, expected_type[0]) and not isinstance(result, expected_type[1]):
-                                                    wrong_types.append(f"{method_name} (expected {expected_type}, got {type(result)})")
-                                            elif not isinstance(result, expected_type):
-                                                wrong_types.append(f"{method_name} (expected {expected_type.__name__}, got {type(result).__name__})")
-                                        except Exception as e:
-                                            wrong_types.append(f"{method_name} (execution error: {str(e)})")
+                                method = getattr(instance, method_name)
+                                if not callable(method):
+                                    missing_methods.append(method_name)
+                                    continue
                                 
-                                if missing_methods or wrong_types:
-                                    error_msg = []
-                                    if missing_methods:
-                                        error_msg.append(f"Missing methods: {', '.join(missing_methods)}")
-                                    if wrong_types:
-                                        error_msg.append(f"Type errors: {', '.join(wrong_types)}")
-                                    compatibility_status['Incompatible'].append({
-                                        'name': file_path.stem,
-                                        'reason': '; '.join(error_msg)
-                                    })
-                                else:
-                                    compatibility_status['Compatible'].append(instance._get_name())
-                                    
-                            except Exception as e:
-                                compatibility_status['Incompatible'].append({
+                                # Check return type if method is not run_guided or run_direct
+                                if method_name not in ['run_guided', 'run_direct']:
+                                    try:
+                                        # Special handling for command methods that need pkg_manager argument
+                                        if method_name in ['_get_update_command', '_get_install_command', '_get_uninstall_command']:
+                                            result = method('apt')  # Use 'apt' as a test value
+                                        else:
+                                            result = method()
+                                            
+                                        if isinstance(expected_type, tuple):
+                                            if not isinstance(result, expected_type[0]) and not isinstance(result, expected_type[1]):
+                                                wrong_types.append(f"{method_name} (expected {expected_type}, got {type(result)})")
+                                        elif not isinstance(result, expected_type):
+                                            wrong_types.append(f"{method_name} (expected {expected_type.__name__}, got {type(result).__name__})")
+                                    except Exception as e:
+                                        wrong_types.append(f"{method_name} (execution error: {str(e)})")
+                            
+                            if missing_methods or wrong_types:
+                                error_msg = []
+                                if missing_methods:
+                                    error_msg.append(f"Missing methods: {', '.join(missing_methods)}")
+                                if wrong_types:
+                                    error_msg.append(f"Type errors: {', '.join(wrong_types)}")
+                                return 'Incompatible', {
                                     'name': file_path.stem,
-                                    'reason': f'Instantiation error: {str(e)}'
-                                })
-                            break
+                                    'reason': '; '.join(error_msg)
+                                }
+                            cls._checked_modules[str(file_path.resolve())] = instance
+                            return 'Compatible', instance._get_name()
+                                
+                        except Exception as e:
+                            return 'Incompatible', {
+                                'name': file_path.stem,
+                                'reason': f'Instantiation error: {str(e)}'
+                            }
+                
+                return 'Incompatible', {
+                    'name': file_path.stem,
+                    'reason': 'No class found that inherits from ToolModule'
+                }
                     
-                    if not found_tool_class:
-                        compatibility_status['Incompatible'].append({
-                            'name': file_path.stem,
-                            'reason': 'No class found that inherits from ToolModule'
-                        })
-                        
-                except Exception as e:
-                    compatibility_status['Incompatible'].append({
-                        'name': file_path.stem,
-                        'reason': f'Import error: {str(e)}'
-                    })
-            
-            # Recursively check subdirectories
-            for subdir in directory.iterdir():
-                if subdir.is_dir() and not subdir.name.startswith('_'):
-                    check_directory(subdir)
+            except Exception as e:
+                return 'Incompatible', {
+                    'name': file_path.stem,
+                    'reason': f'Import error: {str(e)}'
+                }
         
-        # Start recursive check from modules directory
-        check_directory(modules_dir)
+        for file_path in iter_module_files(modules_dir):
+            status, entry = check_file(file_path)
+            compatibility_status[status].append(entry)
         
         return compatibility_status
 
@@ -340,7 +381,7 @@ class ToolModule(GetModule):
         cls.modules = {}  # Reset modules
         
         try:
-            modules_dir = Path(__file__).parent.parent / 'modules'
+            modules_dir = root_dir / 'modules'
             if not modules_dir.exists():
                 if initial_load:
                     print(f"{Colors.WARNING}[!] Modules directory not found{Colors.ENDC}")
@@ -351,18 +392,24 @@ class ToolModule(GetModule):
             if not base_init.exists():
                 base_init.touch()
 
-            def load_module_file(file_path: Path, import_path: str):
-                """Helper function to load a single module file"""
+            def load_module_file(file_path: Path, import_path: str) -> Tuple[Optional['ToolModule'], List[str]]:
+                """Helper function to load a single module file
+                
+                Returns the tool instance, if any, and the messages to show on the
+                initial load, which the caller prints in order.
+                """
+                messages = [f"{Colors.SUBTLE}[*] Attempting to load: {import_path}{Colors.ENDC}"]
+                # Reuse the instance created by the compatibility check, if any
+                tool = checked_modules.pop(str(file_path.resolve()), None)
+                if tool is not None:
+                    messages.append(f"{Colors.CYAN}[+] Loaded module: {tool.name} ({import_path}){Colors.ENDC}")
+                    return tool, messages
                 try:
-                    if initial_load:
-                        print(f"{Colors.SUBTLE}[*] Attempting to load: {import_path}{Colors.ENDC}")
-                    
                     # Import the module
                     spec = importlib.util.spec_from_file_location(import_path, str(file_path))
                     if spec is None:
-                        if initial_load:
-                            print(f"{Colors.FAIL}[!] Could not create spec for {file_path}{Colors.ENDC}")
-                        return
+                        messages.append(f"{Colors.FAIL}[!] Could not create spec for {file_path}{Colors.ENDC}")
+                        return None, messages
                         
                     module = importlib.util.module_from_spec(spec)
                     sys.modules[import_path] = module
@@ -376,29 +423,24 @@ class ToolModule(GetModule):
                             attr != ToolModule):
                             try:
                                 tool = attr()
-                                cls.modules[tool.name.lower()] = tool
-                                if initial_load:
-                                    print(f"{Colors.CYAN}[+] Loaded module: {tool.name} ({import_path}){Colors.ENDC}")
-                                return True
+                                messages.append(f"{Colors.CYAN}[+] Loaded module: {tool.name} ({import_path}){Colors.ENDC}")
+                                return tool, messages
                             except Exception as e:
-                                if initial_load:
-                                    print(f"{Colors.FAIL}[!] Error instantiating module {attr_name}: {e}{Colors.ENDC}")
+                                messages.append(f"{Colors.FAIL}[!] Error instantiating module {attr_name}: {e}{Colors.ENDC}")
                             break
                             
                 except Exception as e:
-                    if initial_load:
-                        print(f"{Colors.FAIL}[!] Error loading module {import_path}: {e}{Colors.ENDC}")
-                        import traceback
-                        print(traceback.format_exc())
-                return False
-
-            # Load modules from base directory
-            for file_path in modules_dir.glob("*.py"):
-                if file_path.name != "__init__.py":
-                    import_path = f"modules.{file_path.stem}"
-                    load_module_file(file_path, import_path)
-
-            # Load modules from category directories
+                    import traceback
+                    messages.append(f"{Colors.FAIL}[!] Error loading module {import_path}: {e}{Colors.ENDC}")
+                    messages.append(traceback.format_exc())
+                return None, messages
+
+            # Modules from the base directory first, then from category directories
+            module_files = [
+                (file_path, f"modules.{file_path.stem}")
+                for file_path in modules_dir.glob("*.py")
+                if file_path.name != "__init__.py"
+            ]
             for category_dir in modules_dir.glob("*"):
                 if category_dir.is_dir() and category_dir.name != "__pycache__":
                     # Ensure category __init__.py exists
@@ -406,10 +448,22 @@ class ToolModule(GetModule):
                     if not category_init.exists():
                         category_init.touch()
                     
-                    for file_path in category_dir.glob("*.py"):
-                        if file_path.name != "__init__.py":
-                            import_path = f"modules.{category_dir.name}.{file_path.stem}"
-                            load_module_file(file_path, import_path)
+                    module_files.extend(
+                        (file_path, f"modules.{category_dir.name}.{file_path.stem}")
+                        for file_path in category_dir.glob("*.py")
+                        if file_path.name != "__init__.py"
+                    )
+
+            # Instances from the compatibility check are only used once, later loads
+            # (e.g. after the shop installs a module) import the files again
+            checked_modules, cls._checked_modules = cls._checked_modules, {}
+            for file_path, import_path in module_files:
+                tool, messages = load_module_file(file_path, import_path)
+                if initial_load:
+                    for message in messages:
+                        print(message)
+                if tool is not None:
+                    cls.modules[tool.name.lower()] = tool
 
             if initial_load:
                 if cls.modules:
@@ -435,7 +489,7 @@ class ToolModule(GetModule):
             # 1. Verify dependencies first
             missing_deps = []
             for dep in self._get_dependencies():
-                if not shutil.which(dep):
+                if not StateCache.which(dep):
                     missing_deps.append(dep)
             
             if missing_deps:
@@ -444,26 +498,33 @@ class ToolModule(GetModule):
 
             # 2. Determine tool type
             is_command_based = bool(self.command and self.command != self._get_name())
-            is_script_based = bool(self._get_script_path())
+            script_path_str = self._get_script_path()
+            is_script_based = bool(script_path_str)
             
             # 3. Command-based verification (installed binaries)
             if is_command_based:
-                command_path = shutil.which(self.command)
+                command_path = StateCache.which(self.command)
                 if command_path:
                     self._installed = True
                     return True
                     
             # 4. Script-based verification
             if is_script_based:
-                script_path = Path(self._get_script_path())
+                script_path = Path(script_path_str)
                 
                 # Get category from class path
                 module_category = self._get_category()
-                scripts_base_dir = Path(__file__).parent.parent / "scripts"
+                scripts_base_dir = root_dir / "scripts"
                 category_scripts_dir = scripts_base_dir / module_category
                 
-                # 4.1 Verify script existence
-                if not script_path.exists():
+                # 4.1 Verify script existence (a missing directory lists as empty)
+                script_dir = script_path.parent
+                try:
+                    with os.scandir(script_dir) as it:
+                        dir_entries = {entry.name for entry in it}
+                except OSError:
+                    dir_entries = set()
+                if script_path.name not in dir_entries:
                     self._installed = False
                     return False
                     
@@ -476,14 +537,7 @@ class ToolModule(GetModule):
                         self._installed = False
                         return False
                 
-                # 4.3 Verify directory structure
-                script_dir = script_path.parent
-                if not script_dir.exists():
-                    print(f"{Colors.WARNING}[!] Script directory not found: {script_dir}{Colors.ENDC}")
-                    self._installed = False
-                    return False
-                    
-                # 4.4 Look for common files based on script type
+                # 4.3 Look for common files based on script type, in the listing taken above
                 if script_path.suffix == '.sh':
                     common_files = ['.git', 'README.md', 'config', 'install.sh']
                 elif script_path.suffix == '.py':
@@ -491,12 +545,12 @@ class ToolModule(GetModule):
                 else:
                     common_files = ['.git', 'README.md']
                 
-                found_files = [file for file in common_files if (script_dir / file).exists()]
+                found_files = [file for file in common_files if file in dir_entries]
                 
                 if found_files:
                     print(f"{Colors.CYAN}[*] Found additional files: {', '.join(found_files)}{Colors.ENDC}")
                 
-                # 4.5 For scripts, if all dependencies and script exist, consider it installed
+                # 4.4 For scripts, if all dependencies and script exist, consider it installed
                 self._installed = True
                 return True
                     
@@ -599,6 +653,9 @@ class ToolModule(GetModule):
                 success = False
                 break
         
+        # Los comandos pueden haber instalado o eliminado ejecutables
+        StateCache.invalidate_executables()
+        
         if not success:
             print(f"[!] Operation {command_type} interrupted")
         else:
@@ -613,43 +670,29 @@ class ToolModule(GetModule):
                     print(f"[+] {tool_name} {'uninstalled' if not is_installed else 'not uninstalled'} successfully")
 
     def get_package_manager(self) -> tuple:
-        """Detecta el gestor de paquetes del sistema"""
-        if platform.system() == 'Linux':
-            package_managers = {
-                '/usr/bin/apt': ('apt', {
-                    'install': 'sudo apt-get install -y',
-                    'update': 'sudo apt-get update && sudo apt-get upgrade -y',
-                    'remove': 'sudo apt-get remove -y',
-                    'autoremove': 'sudo apt-get autoremove -y',
-                    'show_cmd': 'apt show'
-                }),
-                '/usr/bin/yum': ('yum', {
-                    'install': 'sudo yum install -y',
-                    'update': 'sudo yum update -y',
-                    'remove': 'sudo yum remove -y',
-                    'autoremove': 'sudo yum autoremove -y',
-                    'show_cmd': 'yum info'
-                }),
-                '/usr/bin/pacman': ('pacman', {
-                    'install': 'sudo pacman -S --noconfirm',
-                    'update': 'sudo pacman -Syu --noconfirm',
-                    'remove': 'sudo pacman -R --noconfirm',
-                    'autoremove': 'sudo pacman -Rns --noconfirm',
-                    'show_cmd': 'pacman -Si'
-                })
-            }
-            
-            for path, manager_info in package_managers.items():
-                if os.path.exists(path):
-                    return manager_info
-                    
-        return None, None
+        """Detecta el gestor de paquetes del sistema (se comprueba una sola vez por proceso)"""
+        package_manager = ToolModule._package_manager
+        if package_manager is None:
+            # Se detecta en una variable local y se publica de una vez, para que otro
+            # hilo nunca vea un resultado a medias
+            package_manager = (None, None)
+            if platform.system() == 'Linux':
+                for path, manager_info in ToolModule.PACKAGE_MANAGERS.items():
+                    if os.path.exists(path):
+                        package_manager = manager_info
+                        break
+            ToolModule._package_manager = package_manager
+        return package_manager
 
     @property
     def ssh_manager(self) -> SSHManager:
-        """Lazy initialization of SSH manager"""
+        """Lazy initialization of SSH manager
+        
+        Modules share the framework's connection pool, so reconnecting to a host
+        reuses the authenticated connection released by close_ssh().
+        """
         if self._ssh_manager is None:
-            self._ssh_manager = SSHManager()
+            self._ssh_manager = SSHManager(pool=default_pool)
         return self._ssh_manager
 
     def connect_ssh(self, host: str, user: str, use_password: bool = False, key_path: Optional[str] = None) -> Tuple[bool, Optional[str]]:
@@ -1,51 +1,62 @@
 import os
 import platform
+import sys
 
 
 class Colors:
     """Clase para manejar colores en la terminal"""
     
+    # Esquema de colores modernizado
+    COLOR_CODES = {
+        # Colores principales
+        'PRIMARY': '\033[38;5;87m',    # Azul claro brillante
+        'SECONDARY': '\033[38;5;141m', # Púrpura suave
+        'ACCENT': '\033[38;5;219m',    # Rosa suave
+        
+        # Colores de estado
+        'SUCCESS': '\033[38;5;84m',    # Verde brillante
+        'WARNING': '\033[38;5;221m',   # Amarillo suave
+        'ERROR': '\033[38;5;203m',     # Rojo suave
+        
+        # Colores de texto
+        'TEXT': '\033[38;5;252m',      # Blanco suave
+        'SUBTLE': '\033[38;5;242m',    # Gris oscuro
+        'HIGHLIGHT': '\033[38;5;159m', # Azul muy claro
+        
+        # Efectos
+        'BOLD': '\033[1m',
+        'DIM': '\033[2m',
+        'ITALIC': '\033[3m',
+        'UNDERLINE': '\033[4m',
+        'BLINK': '\033[5m',
+        'ENDC': '\033[0m',
+        
+        # Compatibilidad con nombres antiguos
+        'HEADER': '\033[95m',
+        'BLUE': '\033[94m',
+        'CYAN': '\033[96m',
+        'GREEN': '\033[92m',
+        'FAIL': '\033[91m',
+        'OKGREEN': '\033[92m'
+    }
+    
     def __init__(self):
-        self.has_colors = os.getenv('TERM') is not None or \
-                         os.getenv('COLORTERM') is not None or \
-                         platform.system() == 'Windows'
+        # Sin terminal (salida redirigida a un fichero o a otro proceso) los
+        # códigos ANSI solo ensuciarían la salida
+        self.has_colors = sys.stdout is not None and sys.stdout.isatty() and (
+            os.getenv('TERM') is not None or
+            os.getenv('COLORTERM') is not None or
+            platform.system() == 'Windows'
+        )
+        # Se resuelven una sola vez como atributos de la instancia, así cada
+        # acceso es una búsqueda normal y no pasa por __getattr__
+        for name, code in self.COLOR_CODES.items():
+            setattr(self, name, code if self.has_colors else '')
 
     def __getattr__(self, name):
-        # Esquema de colores modernizado
-        color_codes = {
-            # Colores principales
-            'PRIMARY': '\033[38;5;87m',    # Azul claro brillante
-            'SECONDARY': '\033[38;5;141m', # Púrpura suave
-            'ACCENT': '\033[38;5;219m',    # Rosa suave
-            
-            # Colores de estado
-            'SUCCESS': '\033[38;5;84m',    # Verde brillante
-            'WARNING': '\033[38;5;221m',   # Amarillo suave
-            'ERROR': '\033[38;5;203m',     # Rojo suave
-            
-            # Colores de texto
-            'TEXT': '\033[38;5;252m',      # Blanco suave
-            'SUBTLE': '\033[38;5;242m',    # Gris oscuro
-            'HIGHLIGHT': '\033[38;5;159m', # Azul muy claro
-            
-            # Efectos
-            'BOLD': '\033[1m',
-            'DIM': '\033[2m',
-            'ITALIC': '\033[3m',
-            'UNDERLINE': '\033[4m',
-            'BLINK': '\033[5m',
-            'ENDC': '\033[0m',
-            
-            # Compatibilidad con nombres antiguos
-            'HEADER': '\033[95m',
-            'BLUE': '\033[94m',
-            'CYAN': '\033[96m',
-            'GREEN': '\033[92m',
-            'FAIL': '\033[91m',
-            'OKGREEN': '\033[92m'
-        }
-        return color_codes.get(name, '') if self.has_colors else ''
+        # Solo se llega aquí con nombres que no son colores conocidos
+        return ''
 
 
 # Instancia global de Colors
-Colors = Colors()
\ No newline at end of file
+Colors = Colors()
@@ -8,12 +8,12 @@ import getpass
 from datetime import datetime
 from pathlib import Path
 import shutil
-from typing import Dict, Optional, List
+from typing import Dict, Optional, List, Set, Tuple
 import platform
 from .terminal_management import TerminalManager
 from .sessions_manager import SessionManager
 from .colors import Colors
-from .base import ToolModule, PackageManager
+from .base import ToolModule, PackageManager, root_dir
 
 
 class FrameworkInterface(cmd.Cmd):
@@ -41,11 +41,16 @@ class FrameworkInterface(cmd.Cmd):
     def __init__(self):
 
         super().__init__()
-        self.modules = ToolModule.load_modules()
+        # main() ya cargó los módulos; solo se cargan aquí si no hay ninguno
+        self.modules = ToolModule.modules or ToolModule.load_modules()
+        # Índice por categoría calculado para el diccionario de módulos actual (ver _get_category_index)
+        self._category_index: Dict[str, List[ToolModule]] = {}
+        self._category_index_for: Optional[Dict[str, ToolModule]] = None
+        # Comandos de lanzamiento (guiado, directo) ya construidos para cada clase de módulo
+        self._tool_commands: Dict[type, Tuple[str, str]] = {}
         self.session_manager = SessionManager()
         TerminalManager.check_tmux_installed()
         signal.signal(signal.SIGINT, self.handle_sigint)
-        ToolModule.load_modules()
         TerminalManager.clear_screen()
 
 
@@ -214,31 +219,8 @@ class FrameworkInterface(cmd.Cmd):
         session.start_logging()
 
         try:
-            framework_root = Path(__file__).parent.parent
-            
-            # Get module path components
-            module_path = module.__class__.__module__.split('.')
-            module_name = module_path[-1]
-            
-            # Handle module in category directory
-            if len(module_path) > 2:  # modules.Category.module_name
-                category = module_path[-2]
-                import_path = f"modules.{category}.{module_name}"
-            else:  # modules.module_name
-                import_path = f"modules.{module_name}"
-                
-            class_name = module.__class__.__name__
-
-            # Build the command with proper import path
-            cmd = (f"cd {framework_root} && "
-                f"TERM=xterm-256color python3 -u -c \""
-                f"import sys; "
-                f"import readline; "
-                f"sys.path.append('{framework_root}'); "
-                f"from {import_path} import {class_name}; "
-                f"tool = {class_name}(); "
-                f"tool.{'run_guided' if mode == '1' else 'run_direct'}()\"; "
-                f"exec bash -l")
+            guided_cmd, direct_cmd = self._get_tool_commands(module)
+            cmd = guided_cmd if mode == '1' else direct_cmd
 
             print(f"\n{Colors.CYAN}[*] Initializing tmux session...{Colors.ENDC}")
             print(f"{Colors.CYAN}[*] Remember:{Colors.ENDC}")
@@ -270,6 +252,54 @@ class FrameworkInterface(cmd.Cmd):
                 session.kill_terminal()
                 del self.session_manager.sessions[int(session.session_id)]
 
+    def _get_tool_commands(self, module: ToolModule) -> Tuple[str, str]:
+        """
+        Obtiene los comandos que lanzan una herramienta en modo guiado y directo
+        
+        Solo dependen de la clase del módulo, así que se construyen una vez por clase.
+        
+        Args:
+            module: Módulo de la herramienta
+            
+        Returns:
+            Tuple[str, str]: Comandos para modo guiado y modo directo
+        """
+        tool_class = module.__class__
+        commands = self._tool_commands.get(tool_class)
+        if commands is not None:
+            return commands
+            
+        framework_root = root_dir
+        
+        # Get module path components
+        module_path = tool_class.__module__.split('.')
+        module_name = module_path[-1]
+        
+        # Handle module in category directory
+        if len(module_path) > 2:  # modules.Category.module_name
+            category = module_path[-2]
+            import_path = f"modules.{category}.{module_name}"
+        else:  # modules.module_name
+            import_path = f"modules.{module_name}"
+            
+        class_name = tool_class.__name__
+
+        # Build the command with proper import path
+        commands = tuple(
+            f"cd {framework_root} && "
+            f"TERM=xterm-256color python3 -u -c \""
+            f"import sys; "
+            f"import readline; "
+            f"sys.path.append('{framework_root}'); "
+            f"from {import_path} import {class_name}; "
+            f"tool = {class_name}(); "
+            f"tool.{run_method}()\"; "
+            f"exec bash -l"
+            for run_method in ('run_guided', 'run_direct')
+        )
+        self._tool_commands[tool_class] = commands
+        return commands
+
     def do_kill(self, arg: str) -> None:
         """
         Termina sesiones.
@@ -833,12 +863,10 @@ class FrameworkInterface(cmd.Cmd):
 {Colors.CYAN}╠══════════════════════════════════╬═══════════════════════╣'''
         print(header)
 
+        category_index = self._get_category_index()
         for category in sorted(categories)[start_idx:end_idx]:
             # Contar herramientas en esta categoría
-            tools_count = len([
-                tool for tool in self.modules.values()
-                if tool._get_category().lower() == category.lower()
-            ])
+            tools_count = len(category_index.get(category.lower(), []))
             
             # Truncar el nombre de la categoría si es necesario
             cat_trunc = category[:30].ljust(30)
@@ -861,6 +889,33 @@ class FrameworkInterface(cmd.Cmd):
             elif key == 'p' and page > 1:
                 self._display_categories_table(categories, page - 1, items_per_page)
 
+    def _get_category_index(self) -> Dict[str, List[ToolModule]]:
+        """
+        Agrupa los módulos cargados por categoría (en minúsculas)
+        
+        Solo se recalcula cuando self.modules se reemplaza, por ejemplo al
+        recargar los módulos tras una descarga desde la tienda.
+        
+        Returns:
+            Dict[str, List[ToolModule]]: Herramientas de cada categoría
+        """
+        if self._category_index_for is not self.modules:
+            index: Dict[str, List[ToolModule]] = {}
+            for tool in self.modules.values():
+                index.setdefault(tool._get_category().lower(), []).append(tool)
+            self._category_index = index
+            self._category_index_for = self.modules
+        return self._category_index
+
+    def _get_categories(self) -> Set[str]:
+        """
+        Obtiene las categorías (en minúsculas) de los módulos cargados
+        
+        Returns:
+            Set[str]: Categorías disponibles
+        """
+        return set(self._get_category_index())
+
     def _update_installation_status(self, tools: list) -> None:
         """
         Actualiza el estado de instalación de todas las herramientas
@@ -887,7 +942,7 @@ class FrameworkInterface(cmd.Cmd):
         TerminalManager.clear_screen()
         
         # Obtener todas las categorías disponibles
-        all_categories = {tool._get_category().lower() for tool in self.modules.values()}
+        all_categories = self._get_categories()
         
         # Si el argumento es "category", mostrar lista de categorías
         if args[0].lower() == 'category':
@@ -906,11 +961,8 @@ class FrameworkInterface(cmd.Cmd):
             print(f"\n{Colors.CYAN}[*] Use 'show category' to view available categories{Colors.ENDC}")
             return
             
-        # Filtrar herramientas por categoría
-        tools_in_category = [
-            tool for tool in self.modules.values()
-            if tool._get_category().lower() == category
-        ]
+        # Herramientas de la categoría, ya agrupadas en el índice
+        tools_in_category = self._get_category_index()[category]
         
         print(f"\n{Colors.CYAN}[*] Tools in category '{category}':{Colors.ENDC}")
         self._display_tools_table(tools_in_category)
@@ -947,10 +999,7 @@ class FrameworkInterface(cmd.Cmd):
         """Autocompletado para el comando show"""
         words = line.split()
         if len(words) <= 2:
-            categories = {'category'} | {
-                tool._get_category().lower() 
-                for tool in self.modules.values()
-            }
+            categories = {'category'} | self._get_categories()
             if not text:
                 return list(categories)
             return [cat for cat in categories if cat.startswith(text.lower())]
@@ -2,59 +2,276 @@
 Module cache system for CoreSecurityFramework
 """
 import json
+import mmap
+import os
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-import requests
-import base64
+import ast
 import re
-from typing import List, Optional, Dict, Tuple
+from typing import List, Optional, Tuple, TYPE_CHECKING
 from datetime import datetime, timedelta
 from .colors import Colors
 
+# requests is only needed to refresh the cache, so it is imported when a
+# refresh starts rather than on every framework startup
+if TYPE_CHECKING:
+    import requests
+
+# orjson is optional, it only speeds up reading and writing the cache file
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _loads(data):
+    """Deserialize cache file contents from bytes or a read-only mmap"""
+    if orjson:
+        # orjson parses straight from the buffer without copying it
+        with memoryview(data) as view:
+            return orjson.loads(view)
+    return json.loads(data[:])
+
+
+def _dumps(obj) -> bytes:
+    """Serialize cache file contents"""
+    if orjson:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    return json.dumps(obj, indent=4).encode()
+
+_METADATA_GETTERS = ('_get_category', '_get_description')
+
+# Single pass over the module source for both metadata getters; the scan for
+# the return stops at the next def so it never reads another method's value
+_METADATA_RE = re.compile(
+    r'def\s+_get_(?P<kind>category|description)(?:(?!\bdef\s).)*?return\s+[\'"](?P<val>.+?)[\'"]',
+    re.DOTALL
+)
+
 class ModuleCache:
     CACHE_FILE = Path(__file__).parent.parent / 'cache' / 'modules_cache.json'
     CACHE_DURATION = timedelta(hours=12)
+    MAX_WORKERS = 8
+    MAX_RATE_LIMIT_WAIT = 60
+    # Metadata getters and the module docstring sit near the top of the file
+    METADATA_HEAD_BYTES = 8192
+
+    # Parsed cache file, keyed by the file mtime it was read at
+    _in_mem_cache: Optional[dict] = None
+    _in_mem_mtime: Optional[float] = None
+
+    @classmethod
+    def _load_cache(cls) -> dict:
+        """Return the parsed cache file, re-reading it only when its mtime changed
+        
+        Raises OSError if the file is missing and ValueError if it is invalid.
+        """
+        mtime = cls.CACHE_FILE.stat().st_mtime
+        if cls._in_mem_cache is None or cls._in_mem_mtime != mtime:
+            with open(cls.CACHE_FILE, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                cls._in_mem_cache = _loads(mm)
+            cls._in_mem_mtime = mtime
+        return cls._in_mem_cache
 
     @classmethod
     def needs_update(cls) -> bool:
         """Check if cache needs to be updated"""
-        if not cls.CACHE_FILE.exists():
+        # The file is rewritten on every refresh, so a recent mtime answers
+        # without checking last_update, as long as the file is non-empty and parses
+        try:
+            stat = cls.CACHE_FILE.stat()
+        except OSError:
             return True
-            
+        if stat.st_size and time.time() - stat.st_mtime < cls.CACHE_DURATION.total_seconds():
+            try:
+                cls._load_cache()
+                return False
+            except Exception:
+                pass
         try:
-            with open(cls.CACHE_FILE) as f:
-                cache = json.load(f)
-                last_update = datetime.fromisoformat(cache.get('last_update', '2000-01-01'))
-                return datetime.now() - last_update > cls.CACHE_DURATION
+            last_update = datetime.fromisoformat(cls._load_cache().get('last_update', '2000-01-01'))
+            return datetime.now() - last_update > cls.CACHE_DURATION
         except:
             return True
 
     @classmethod
-    def _fetch_repo_contents(cls, api_url: str, path: str = "", headers: dict = None) -> List[dict]:
-        """Recursively fetch repository contents including subdirectories"""
+    def _read_cache(cls) -> dict:
+        """Read the whole cache file, returning an empty dict if it is missing or invalid"""
+        try:
+            return dict(cls._load_cache())
+        except Exception:
+            return {}
+
+    @classmethod
+    def _write_cache(cls, cache_data: dict) -> None:
+        """Write the cache file atomically"""
+        # Write to a temporary file and swap it in so a crash never leaves a truncated cache
+        tmp_file = cls.CACHE_FILE.with_suffix('.json.tmp')
+        data = _dumps(cache_data)
+        with open(tmp_file, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, cls.CACHE_FILE)
+        cls._in_mem_cache = None
+
+    @classmethod
+    def _create_session(cls, headers: dict) -> "requests.Session":
+        """Create a keep-alive HTTP session shared by all cache refresh requests"""
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+        
+        session = requests.Session()
+        session.headers.update(headers)
+        adapter = HTTPAdapter(
+            pool_connections=cls.MAX_WORKERS,
+            pool_maxsize=cls.MAX_WORKERS,
+            max_retries=Retry(
+                total=3,
+                backoff_factor=0.3,
+                status_forcelist=[429, 500, 502, 503, 504],
+                raise_on_status=False
+            )
+        )
+        session.mount("https://api.github.com", adapter)
+        session.mount("https://raw.githubusercontent.com", adapter)
+        return session
+
+    @classmethod
+    def _get(cls, session: "requests.Session", url: str, headers: dict = None) -> "requests.Response":
+        """GET a URL, waiting once for GitHub's rate limit window if it was hit"""
+        response = session.get(url, headers=headers)
+        if response.status_code in (403, 429):
+            wait = response.headers.get("Retry-After")
+            if wait is None and response.headers.get("X-RateLimit-Remaining") == "0":
+                reset = response.headers.get("X-RateLimit-Reset")
+                wait = int(reset) - int(time.time()) if reset else None
+            if wait is not None:
+                time.sleep(min(max(int(wait), 1), cls.MAX_RATE_LIMIT_WAIT))
+                response = session.get(url, headers=headers)
+        return response
+
+    @classmethod
+    def _fetch_repo_contents(cls, session: "requests.Session", api_url: str, path: str = "") -> Tuple[List[dict], bool]:
+        """Recursively fetch repository contents including subdirectories
+        
+        Returns the files found and whether every directory could be listed.
+        """
         contents = []
         current_url = f"{api_url}/{path}".rstrip('/')
+        complete = True
         
         try:
-            response = requests.get(current_url, headers=headers)
+            response = cls._get(session, current_url)
             response.raise_for_status()
             
             for item in response.json():
                 if item["type"] == "dir":
                     # Recursively fetch contents of subdirectory
-                    contents.extend(cls._fetch_repo_contents(api_url, item["path"], headers))
+                    sub_contents, sub_complete = cls._fetch_repo_contents(session, api_url, item["path"])
+                    contents.extend(sub_contents)
+                    complete = complete and sub_complete
                 elif item["type"] == "file" and item["name"].endswith(".py"):
                     # Add file details to contents
                     contents.append({
                         "path": item["path"],  # Include full path from repo root
                         "name": item["name"],
+                        "sha": item.get("sha"),
                         "url": item["html_url"].replace("github.com", "raw.githubusercontent.com").replace("/blob/", "/")
                     })
                     
-            return contents
+            return contents, complete
         except Exception as e:
             print(f"{Colors.FAIL}[!] Error fetching repository contents: {e}{Colors.ENDC}")
-            return contents
+            return contents, False
+
+    @classmethod
+    def _fetch_head_commit(cls, session: "requests.Session", repo_api_url: str, etag: Optional[str] = None) -> Tuple[Optional[str], Optional[str]]:
+        """Get the repository HEAD commit SHA and its ETag
+        
+        When the given ETag still matches, GitHub answers 304 without using
+        rate limit and (None, etag) is returned. On errors (None, None) is returned.
+        """
+        try:
+            response = cls._get(session, f"{repo_api_url}/commits/HEAD", headers={"If-None-Match": etag} if etag else None)
+            if response.status_code == 304:
+                return None, etag
+            response.raise_for_status()
+            return response.json()["sha"], response.headers.get("ETag")
+        except Exception as e:
+            print(f"{Colors.WARNING}[!] Could not check repository HEAD: {e}{Colors.ENDC}")
+            return None, None
+
+    @classmethod
+    def _fetch_repo_tree(cls, session: "requests.Session", repo_api_url: str, raw_base_url: str, ref: str = "HEAD") -> Optional[List[dict]]:
+        """Fetch every module file of the repository with a single Git Trees API call
+        
+        Returns None when the tree is unavailable or truncated so the caller
+        can fall back to walking the contents API.
+        """
+        try:
+            response = cls._get(session, f"{repo_api_url}/git/trees/{ref}?recursive=1")
+            response.raise_for_status()
+            tree = response.json()
+            if tree.get("truncated"):
+                return None
+            
+            return [
+                {
+                    "path": entry["path"],
+                    "name": entry["path"].rsplit("/", 1)[-1],
+                    "sha": entry.get("sha"),
+                    "url": f"{raw_base_url}/{ref}/{entry['path']}"
+                }
+                for entry in tree.get("tree", [])
+                if entry.get("type") == "blob" and entry["path"].endswith(".py")
+            ]
+        except Exception as e:
+            print(f"{Colors.WARNING}[!] Could not fetch repository tree, walking contents instead: {e}{Colors.ENDC}")
+            return None
+
+    @classmethod
+    def _fetch_module_entry(cls, session: "requests.Session", item: dict) -> Optional[dict]:
+        """Download a single module file and build its cache entry"""
+        try:
+            # Get only the head of the file to parse metadata
+            file_response = cls._get(session, item["url"], headers={"Range": f"bytes=0-{cls.METADATA_HEAD_BYTES - 1}"})
+            file_response.raise_for_status()
+            
+            # Parse module info
+            name = item["name"].replace(".py", "")
+            description, category = cls._parse_module_info(file_response.text)
+            
+            # Metadata past the fetched head is rare, re-read the whole file in that case.
+            # A getter cut off from the head can leave a fallback value that looks
+            # valid (the docstring for the description), so look for the defs too
+            if file_response.status_code == 206 and (
+                description == "No description" or category == "Uncategorized"
+                or not all(re.search(rf'def\s+{getter}\b', file_response.text) for getter in _METADATA_GETTERS)
+            ):
+                file_response = cls._get(session, item["url"])
+                file_response.raise_for_status()
+                description, category = cls._parse_module_info(file_response.text)
+            
+            # If category not explicitly defined, use directory name
+            if category == "Uncategorized" and "/" in item["path"]:
+                category = item["path"].split("/")[0]
+            
+            return {
+                "name": name,
+                "description": description,
+                "category": category,
+                "url": item["url"],
+                "filename": item["name"],
+                "path": item["path"],  # Store full path for correct loading
+                "sha": item.get("sha")
+            }
+            
+        except Exception as e:
+            print(f"{Colors.WARNING}[!] Error processing module {item['name']}: {e}{Colors.ENDC}")
+            return None
 
     @classmethod
     def update_cache(cls, repo_url: str) -> bool:
@@ -65,59 +282,67 @@ class ModuleCache:
             # Create cache directory if needed
             cls.CACHE_FILE.parent.mkdir(exist_ok=True)
             
-            # Convert GitHub URL to API URL
-            api_url = repo_url.replace("github.com", "api.github.com/repos")
-            if api_url.endswith("/"):
-                api_url = api_url[:-1]
-            api_url += "/contents"
+            # Convert GitHub URL to API and raw content URLs
+            repo_url = repo_url.rstrip("/")
+            repo_api_url = repo_url.replace("github.com", "api.github.com/repos")
+            raw_base_url = repo_url.replace("github.com", "raw.githubusercontent.com")
             
             headers = {
                 "Accept": "application/vnd.github.v3+json",
                 "User-Agent": "CoreSecFrame-ModuleCache"
             }
             
-            # Fetch all repository contents recursively
-            modules = []
-            contents = cls._fetch_repo_contents(api_url, headers=headers)
+            old_cache = cls._read_cache()
+            if old_cache.get("repo_url") != repo_url:
+                old_cache = {}
             
-            for item in contents:
-                try:
-                    # Get file content to parse metadata
-                    file_response = requests.get(item["url"], headers=headers)
-                    content = file_response.text
-                    
-                    # Parse module info
-                    name = item["name"].replace(".py", "")
-                    description, category = cls._parse_module_info(content)
-                    
-                    # If category not explicitly defined, use directory name
-                    if category == "Uncategorized" and "/" in item["path"]:
-                        category = item["path"].split("/")[0]
-                    
-                    modules.append({
-                        "name": name,
-                        "description": description,
-                        "category": category,
-                        "url": item["url"],
-                        "filename": item["name"],
-                        "path": item["path"]  # Store full path for correct loading
-                    })
-                    
-                    # Add delay to avoid rate limiting
-                    time.sleep(1)
-                    
-                except Exception as e:
-                    print(f"{Colors.WARNING}[!] Error processing module {item['name']}: {e}{Colors.ENDC}")
-                    continue
+            with cls._create_session(headers) as session:
+                # Skip the whole refresh when the repository HEAD has not moved
+                head_sha, etag = cls._fetch_head_commit(session, repo_api_url, old_cache.get("etag"))
+                if old_cache and etag and (head_sha is None or head_sha == old_cache.get("head_sha")):
+                    old_cache["last_update"] = datetime.now().isoformat()
+                    old_cache["etag"] = etag
+                    cls._write_cache(old_cache)
+                    print(f"{Colors.GREEN}[✓] Modules cache is already up to date{Colors.ENDC}")
+                    return True
+                
+                # List all module files in one request, walking directories only as a fallback
+                contents = cls._fetch_repo_tree(session, repo_api_url, raw_base_url, head_sha or "HEAD")
+                complete = True
+                if contents is None:
+                    contents, complete = cls._fetch_repo_contents(session, f"{repo_api_url}/contents")
+                
+                # Blobs whose sha did not change keep their cached metadata
+                old_modules = {m["path"]: m for m in old_cache.get("modules", []) if m.get("sha")}
+                
+                def fetch_entry(item: dict) -> Optional[dict]:
+                    old = old_modules.get(item["path"])
+                    if old and old["sha"] == item.get("sha"):
+                        return {**old, "url": item["url"]}
+                    return cls._fetch_module_entry(session, item)
+                
+                # Download changed module files concurrently, keeping repository order
+                modules = []
+                if contents:
+                    with ThreadPoolExecutor(max_workers=min(cls.MAX_WORKERS, len(contents))) as executor:
+                        for entry in executor.map(fetch_entry, contents):
+                            if entry:
+                                modules.append(entry)
+                
+                # A partial refresh must not be taken as up to date next time, or the
+                # missing modules would only be fetched once upstream HEAD moves
+                if not complete or len(modules) != len(contents):
+                    head_sha, etag = None, None
             
             # Save to cache file
             cache_data = {
                 "last_update": datetime.now().isoformat(),
+                "repo_url": repo_url,
+                "head_sha": head_sha,
+                "etag": etag,
                 "modules": modules
             }
-            
-            with open(cls.CACHE_FILE, 'w') as f:
-                json.dump(cache_data, f, indent=4)
+            cls._write_cache(cache_data)
                 
             print(f"{Colors.GREEN}[✓] Cache updated successfully{Colors.ENDC}")
             return True
@@ -130,12 +355,7 @@ class ModuleCache:
     def get_cached_modules(cls) -> list:
         """Get modules from cache"""
         try:
-            if not cls.CACHE_FILE.exists():
-                return []
-                
-            with open(cls.CACHE_FILE) as f:
-                cache = json.load(f)
-                return cache.get('modules', [])
+            return cls._load_cache().get('modules', [])
         except:
             return []
 
@@ -146,18 +366,59 @@ class ModuleCache:
         category = "Uncategorized"
         
         try:
-            # Look for category in _get_category()
-            if "_get_category" in content:
-                cat_match = re.search(r'def\s+_get_category.*?return\s+[\'"](.+?)[\'"]', content, re.DOTALL)
-                if cat_match:
-                    category = cat_match.group(1)
-            
-            # Look for description in _get_description() or docstring
-            if "_get_description" in content:
-                desc_match = re.search(r'def\s+_get_description.*?return\s+[\'"](.+?)[\'"]', content, re.DOTALL)
-                if desc_match:
-                    description = desc_match.group(1)
-            elif '"""' in content:
+            tree = ast.parse(content)
+        except (SyntaxError, ValueError):
+            # Truncated head of the file or invalid source, scan the raw text instead
+            return cls._scan_module_info(content)
+        
+        # Look for category in _get_category() and description in _get_description()
+        found = set()
+        for node in ast.walk(tree):
+            if not isinstance(node, ast.FunctionDef) or node.name not in _METADATA_GETTERS or node.name in found:
+                continue
+            for sub in ast.walk(node):
+                if isinstance(sub, ast.Return) and isinstance(sub.value, ast.Constant) and isinstance(sub.value.value, str):
+                    if node.name == '_get_category':
+                        category = sub.value.value
+                    else:
+                        description = sub.value.value
+                    found.add(node.name)
+                    break
+            if len(found) == 2:
+                break
+        
+        # Fall back to the module docstring for the description
+        if description == "No description":
+            docstring = ast.get_docstring(tree)
+            if docstring:
+                description = docstring.strip().split('\n', 1)[0]
+        
+        return description, category
+
+    @classmethod
+    def _scan_module_info(cls, content: str) -> tuple:
+        """Parse module metadata from source that does not compile"""
+        description = "No description"
+        category = "Uncategorized"
+        
+        try:
+            # Look for category in _get_category() and description in _get_description()
+            has_getters = "_get_category" in content or "_get_description" in content
+            found = set()
+            for match in (_METADATA_RE.finditer(content) if has_getters else ()):
+                kind = match.group('kind')
+                if kind in found:
+                    continue
+                found.add(kind)
+                if kind == 'category':
+                    category = match.group('val')
+                else:
+                    description = match.group('val')
+                if len(found) == 2:
+                    break
+            
+            # Fall back to the module docstring for the description
+            if "_get_description" not in content and '"""' in content:
                 doc_start = content.find('"""') + 3
                 doc_end = content.find('"""', doc_start)
                 if doc_end > doc_start:
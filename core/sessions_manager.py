@@ -1,21 +1,70 @@
+import io
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, List, Optional, Set
+from typing import Dict, Optional, Set, Tuple
 from .terminal_management import TerminalManager
+from .state_cache import StateCache
 from .logs_manager import LogManager
 from .colors import Colors
 
+# Bordes y cabecera de la tabla de sesiones, construidos una sola vez
+_TABLE_TOP = f"{Colors.CYAN}╔{'═' * 14}╦{'═' * 20}╦{'═' * 37}╦{'═' * 14}╗{Colors.ENDC}"
+_TABLE_HEAD = (
+    f"{Colors.CYAN}║ {Colors.ACCENT}{'ID':12} {Colors.CYAN}║ {Colors.ACCENT}{'Tool':18} "
+    f"{Colors.CYAN}║ {Colors.ACCENT}{'Type':35} {Colors.CYAN}║ {Colors.ACCENT}{'Status':12} {Colors.CYAN}║{Colors.ENDC}"
+)
+_TABLE_MID = f"{Colors.CYAN}╠{'═' * 14}╬{'═' * 20}╬{'═' * 37}╬{'═' * 14}╣{Colors.ENDC}"
+_TABLE_BOTTOM = f"{Colors.CYAN}╚{'═' * 14}╩{'═' * 20}╩{'═' * 37}╩{'═' * 14}╝{Colors.ENDC}"
+_ROW_START = f"{Colors.CYAN}║ "
+_ROW_END = f" {Colors.CYAN}║{Colors.ENDC}"
+_STATUS_ACTIVE = f"{Colors.GREEN}{'ACTIVE':12}{Colors.ENDC}"
+_STATUS_INACTIVE = f"{Colors.FAIL}{'INACTIVE':12}{Colors.ENDC}"
+
+
+def _fmt_row(session_id: int, session: "Session") -> str:
+    """Formatea la fila de una sesión para la tabla de list_sessions"""
+    # Las columnas de texto solo cambian al ejecutar comandos
+    if session._display_dirty:
+        # Truncar valores largos
+        id_str = str(session_id)[:12].ljust(12)
+        # Usar module_name en lugar de host
+        module_name = (session.module_name or "N/A")[:18].ljust(18)
+        # Determinar el tipo (puede ser Guiado o Directo)
+        tipo = (session.last_command if session.last_command else "N/A")[:35].ljust(35)
+        session._cached_display = (id_str, module_name, tipo)
+        session._display_dirty = False
+    id_str, module_name, tipo = session._cached_display
+    # Estado coloreado según active, se decide en cada render
+    status = _STATUS_ACTIVE if session.active else _STATUS_INACTIVE
+
+    return "".join((_ROW_START, id_str, " ║ ", module_name, " ║ ", tipo, " ║ ", status, _ROW_END, "\n"))
+
 
 class Session:
     """Representa una sesión individual del framework"""
     
+    # Número máximo de comandos guardados en memoria (el log conserva todo)
+    HISTORY_SIZE = 1000
+    # Tamaño máximo de salida guardada por comando en el historial
+    MAX_HISTORY_OUTPUT = 64 * 1024
+    
     def __init__(self, session_id: str, module_name: str = None):
         self.session_id = session_id
         self.name = session_id
+        # ID numérico de la sesión tmux, calculado una sola vez
+        self._name_int = int(session_id) if session_id.isdigit() else None
         self.module_name = module_name  # Añadimos el nombre del módulo
         self.start_time = datetime.now()
         self.active = True
         self.last_command = None
-        self.history: List[dict] = []
+        # Columnas ya formateadas para list_sessions
+        self._cached_display: Optional[Tuple[str, str, str]] = None
+        self._display_dirty = True
+        self.history: deque = deque(maxlen=self.HISTORY_SIZE)
         self.log_manager = LogManager(session_id, session_id)
 
     def attach_to_tmux(self) -> bool:
@@ -32,13 +81,20 @@ class Session:
 
     def add_to_history(self, command: str, output: str = None) -> None:
         """Añade un comando al historial de la sesión"""
+        # Las salidas enormes solo se guardan completas en el log
+        history_output = output
+        if output and len(output) > self.MAX_HISTORY_OUTPUT:
+            history_output = f"[output omitted: {len(output)} characters]"
+        
         entry = {
-            'timestamp': datetime.now(),
+            # Epoch en nanosegundos; se formatea con datetime.fromtimestamp(ts / 1e9) al mostrarlo
+            'timestamp_ns': time.time_ns(),
             'command': command,
-            'output': output
+            'output': history_output
         }
         self.history.append(entry)
         self.last_command = command
+        self._display_dirty = True
         
         # También registrar en el log si está activo
         self.log_manager.log(f"Command: {command}")
@@ -65,10 +121,38 @@ class Session:
 class SessionManager:
     """Gestiona todas las sesiones del framework"""
     
+    # Segundos durante los que se reutiliza la consulta a 'tmux list-sessions'
+    TMUX_CACHE_TTL = 1.0
+    # Número máximo de sesiones tmux cerradas en paralelo
+    MAX_KILL_WORKERS = 16
+    
     def __init__(self):
         self.sessions: Dict[int, Session] = {}
         self.session_count = 0
-        self.inactive_sessions: Set[int] = set()
+        # Máscara de bits con los IDs de las sesiones inactivas (bit n = sesión n)
+        self._inactive_mask = 0
+        # Protege sessions, session_count y _inactive_mask
+        self._lock = threading.RLock()
+
+    @property
+    def inactive_sessions(self) -> Set[int]:
+        """IDs de las sesiones inactivas"""
+        mask = self._inactive_mask
+        return {i for i in range(mask.bit_length()) if mask >> i & 1}
+
+    def _get_tmux_ids(self, max_age: float = None) -> Tuple[Set[int], Optional[str]]:
+        """Obtiene los IDs numéricos de las sesiones tmux vivas
+        
+        Reutiliza la última consulta si tiene menos de max_age segundos.
+        
+        Returns:
+            Tuple[Set[int], Optional[str]]: IDs de sesiones y posible mensaje de error
+        """
+        return StateCache.tmux_ids(self.TMUX_CACHE_TTL if max_age is None else max_age)
+
+    def _invalidate_tmux_cache(self) -> None:
+        """Descarta la consulta de tmux guardada tras modificar sesiones"""
+        StateCache.invalidate_tmux()
 
     def create_session(self, name: str, tool=None) -> Session:
         """
@@ -81,16 +165,18 @@ class SessionManager:
         Returns:
             Session: Nueva sesión creada
         """
-        self.check_sessions_initialized()
-        self.session_count += 1
+        with self._lock:
+            self.check_sessions_initialized()
+            self.session_count += 1
         
-        # Obtener el nombre del módulo si tool está presente
-        module_name = tool._get_name() if tool else name
+            # Obtener el nombre del módulo si tool está presente
+            module_name = tool._get_name() if tool else name
         
-        session = Session(str(self.session_count), module_name)
-        self.sessions[self.session_count] = session
-        print(f"{Colors.GREEN}[+] New session created: {self.session_count} ({module_name}){Colors.ENDC}")
-        return session
+            session = Session(str(self.session_count), module_name)
+            self.sessions[self.session_count] = session
+            self._invalidate_tmux_cache()
+            print(f"{Colors.GREEN}[+] New session created: {self.session_count} ({module_name}){Colors.ENDC}")
+            return session
 
     def check_sessions_initialized(self) -> bool:
         """Verifica y actualiza el estado de todas las sesiones
@@ -98,95 +184,75 @@ class SessionManager:
         Returns:
             bool: True si las sesiones están correctamente inicializadas
         """
-        tmux_sessions, error = TerminalManager.list_tmux_sessions()
+        with self._lock:
+            live_ids, error = self._get_tmux_ids()
         
-        if error and "There is no tmux server" in error:
-            # Si no hay servidor tmux, marcar todas las sesiones como inactivas
-            for session in self.sessions.values():
-                session.active = False
-                self.inactive_sessions.add(int(session.name))
-            return True
+            if error and "There is no tmux server" in error:
+                # Si no hay servidor tmux, marcar todas las sesiones como inactivas
+                for session in self.sessions.values():
+                    session.active = False
+                    if session._name_int is not None:
+                        self._inactive_mask |= 1 << session._name_int
+                return True
             
-        # Procesar las sesiones existentes
-        tmux_sessions_dict = {}
-        self.inactive_sessions.clear()
+            # Procesar las sesiones existentes
+            self._inactive_mask = 0
         
-        if not error:
-            for line in tmux_sessions:
-                if ':' in line:
-                    session_id = int(line.split(':')[0].strip())
-                    tmux_sessions_dict[session_id] = True
-            
-            # Actualizar el estado de las sesiones existentes
-            for session in self.sessions.values():
-                if session.name.isdigit():
-                    session_id = int(session.name)
-                    if session_id not in tmux_sessions_dict:
-                        session.active = False
-                        self.inactive_sessions.add(session_id)
-                    else:
-                        session.active = True
+            if not error:
+                # Actualizar el estado de las sesiones existentes
+                for session in self.sessions.values():
+                    session_id = session._name_int
+                    if session_id is not None:
+                        if session_id not in live_ids:
+                            session.active = False
+                            self._inactive_mask |= 1 << session_id
+                        else:
+                            session.active = True
             
-            # Actualizar el contador al máximo ID encontrado
-            if tmux_sessions_dict:
-                self.session_count = max(tmux_sessions_dict.keys())
+                # Actualizar el contador al máximo ID encontrado
+                self.session_count = max(live_ids, default=self.session_count)
         
-        return True
+            return True
 
     def list_sessions(self):
         """
         Lista las sesiones activas en formato de tabla
         """
-        self.check_sessions_initialized()
+        # Tomar una copia bajo el lock y dibujar la tabla fuera de él
+        with self._lock:
+            self.check_sessions_initialized()
+            sessions = list(self.sessions.items())
 
-        if not self.sessions:
+        if not sessions:
             print(f"{Colors.WARNING}[!] No active sessions{Colors.ENDC}")
             return
 
-        # Encabezado de la tabla
-        print(f"\n{Colors.CYAN}╔{'═' * 14}╦{'═' * 20}╦{'═' * 37}╦{'═' * 14}╗{Colors.ENDC}")
-        print(f"{Colors.CYAN}║ {Colors.ACCENT}{'ID':12} {Colors.CYAN}║ {Colors.ACCENT}{'Tool':18} {Colors.CYAN}║ {Colors.ACCENT}{'Type':35} {Colors.CYAN}║ {Colors.ACCENT}{'Status':12} {Colors.CYAN}║{Colors.ENDC}")
-        print(f"{Colors.CYAN}╠{'═' * 14}╬{'═' * 20}╬{'═' * 37}╬{'═' * 14}╣{Colors.ENDC}")
+        # Construir la tabla completa y escribirla de una vez
+        buf = io.StringIO()
+        buf.write(f"\n{_TABLE_TOP}\n{_TABLE_HEAD}\n{_TABLE_MID}\n")
+        for session_id, session in sessions:
+            buf.write(_fmt_row(session_id, session))
+        buf.write(f"{_TABLE_BOTTOM}\n")
 
-        for session_id, session in self.sessions.items():
-            
-            # Truncar valores largos
-            id_str = str(session_id)[:12].ljust(12)
-            # Usar module_name en lugar de host
-            module_name = (session.module_name if hasattr(session, 'module_name') and session.module_name else "N/A")[:18].ljust(18)
-            # Determinar el tipo (puede ser Guiado o Directo)
-            tipo = (session.last_command if session.last_command else "N/A")[:35].ljust(35)
-            # Estado basado en active
-            status = ("ACTIVE" if session.active else "INACTIVE")[:12].ljust(12)
-            
-            # Colorear estado
-            if session.active:
-                status = f"{Colors.GREEN}{status}{Colors.ENDC}"
-            else:
-                status = f"{Colors.FAIL}{status}{Colors.ENDC}"
-
-            print(f"{Colors.CYAN}║ {id_str} ║ {module_name} ║ {tipo} ║ {status} {Colors.CYAN}║{Colors.ENDC}")
-
-        # Pie de la tabla
-        print(f"{Colors.CYAN}╚{'═' * 14}╩{'═' * 20}╩{'═' * 37}╩{'═' * 14}╝")
-        
+        sys.stdout.write(buf.getvalue())
+        sys.stdout.flush()
 
     def clear_sessions(self) -> None:
         """Limpia las sesiones inactivas"""
-        self.check_sessions_initialized()
+        with self._lock:
+            self.check_sessions_initialized()
         
-        if not self.inactive_sessions:
-            print(f"\n{Colors.GREEN}[✓] There are no inactive sessions to clear{Colors.ENDC}")
-            return
+            if not self._inactive_mask:
+                print(f"\n{Colors.GREEN}[✓] There are no inactive sessions to clear{Colors.ENDC}")
+                return
 
-        # Eliminar las sesiones inactivas
-        for session_id in self.inactive_sessions:
-            if session_id in self.sessions:
-                del self.sessions[session_id]
-                print(f"{Colors.WARNING}[!] Deleted inactive session {session_id}{Colors.ENDC}")
+            # Eliminar las sesiones inactivas
+            for session_id in self.inactive_sessions:
+                if self.sessions.pop(session_id, None) is not None:
+                    print(f"{Colors.WARNING}[!] Deleted inactive session {session_id}{Colors.ENDC}")
 
-        print(f"\n{Colors.GREEN}[✓] {len(self.inactive_sessions)} inactive sessions deleted{Colors.ENDC}")
-        self.inactive_sessions.clear()
+            print(f"\n{Colors.GREEN}[✓] {bin(self._inactive_mask).count('1')} inactive sessions deleted{Colors.ENDC}")
+            self._inactive_mask = 0
 
     def kill_session(self, session_id: str) -> None:
         """Termina una sesión específica
@@ -196,12 +262,14 @@ class SessionManager:
         """
         try:
             sid = int(session_id)
-            if sid in self.sessions:
-                session = self.sessions[sid]
+            with self._lock:
+                session = self.sessions.pop(sid, None)
+            if session is not None:
                 session.active = False
                 session.stop_logging()
                 session.kill_terminal()
-                del self.sessions[sid]
+                self._invalidate_tmux_cache()
+                StateCache.prefetch_tmux()
                 print(f"{Colors.GREEN}[✓] Session {sid} terminated{Colors.ENDC}")
             else:
                 print(f"{Colors.FAIL}[!] Session not found{Colors.ENDC}")
@@ -228,28 +296,36 @@ class SessionManager:
             print(f"\n{Colors.CYAN}[*] Returning to framework...{Colors.ENDC}")
             return
 
+        # Take the sessions out of the manager before killing them outside the lock
+        with self._lock:
+            sessions = list(self.sessions.values())
+            self.sessions.clear()
+            self.session_count = 0
+
         try:
-            # Try to kill each session
-            for session in list(self.sessions.values()):
+            # Get the live tmux sessions once instead of probing each one
+            tmux_sessions, _ = TerminalManager.list_tmux_sessions()
+            live_names = {line.split(':', 1)[0].strip() for line in tmux_sessions if ':' in line}
+
+            def kill_one(session: Session) -> None:
+                try:
+                    session.stop_logging()
+                except Exception:
+                    pass
                 try:
-                    # Verify if tmux session exists before trying to kill it
-                    result = subprocess.run(
-                        ['tmux', 'has-session', '-t', session.name],
-                        stdout=subprocess.PIPE,
-                        stderr=subprocess.PIPE
-                    )
-                    if result.returncode == 0:  # Session exists
-                        session.stop_logging()
+                    # Only sessions that still exist in tmux need to be killed
+                    if session.name in live_names:
                         session.kill_terminal()
-                    else:
-                        # Session doesn't exist, just cleanup the object
-                        session.stop_logging()
                 except Exception:
-                    continue  # Skip to next session if there's any error
+                    pass  # Skip the session if there's any error
 
-            # Clear the sessions dictionary
-            self.sessions.clear()
-            self.session_count = 0
+            # Kill the sessions concurrently, each one is an independent tmux call
+            if sessions:
+                with ThreadPoolExecutor(max_workers=min(self.MAX_KILL_WORKERS, len(sessions))) as executor:
+                    list(executor.map(kill_one, sessions))
+
+            self._invalidate_tmux_cache()
+            StateCache.prefetch_tmux()
             print(f"\n{Colors.GREEN}[✓] All sessions killed{Colors.ENDC}")
         except Exception as e:
             print(f"\n{Colors.FAIL}[!] Error killing sessions: {e}{Colors.ENDC}")
@@ -268,6 +344,9 @@ class SessionManager:
                     print(f"\n{Colors.CYAN}[*] Session {sid} ({session.name}) connected{Colors.ENDC}")
                     print(f"{Colors.CYAN}[*] Use Ctrl+b d to return to the framework{Colors.ENDC}")
                     if session.attach_to_tmux():
+                        # La sesión pudo terminar mientras estaba conectada
+                        self._invalidate_tmux_cache()
+                        StateCache.prefetch_tmux()
                         print(f"\n{Colors.GREEN}[✓] You have returned to the framework{Colors.ENDC}")
                     else:
                         print(f"{Colors.FAIL}[!] It was not possible to connect to the session{Colors.ENDC}")
@@ -7,11 +7,34 @@ import re
 import textwrap
 import requests
 import base64
+from collections import Counter
 from pathlib import Path
 from dataclasses import dataclass
-from typing import List, Dict, Set
+from typing import List, Dict, Set, Tuple
 from .colors import Colors
 from .base import ToolModule
+from .state_cache import StateCache
+
+# Keep-alive connection shared by successive module downloads
+_HTTP = requests.Session()
+
+# Metadata getters defined by every module, scanned in a single pass; the scan
+# for the return stops at the next def so it never reads another method's value
+_META_RE = re.compile(
+    r'(?:def\s+_get_category(?:(?!\bdef\s).)*?return\s+[\'"](?P<cat>.+?)[\'"])'
+    r'|(?:def\s+_get_description(?:(?!\bdef\s).)*?return\s+[\'"](?P<desc>.+?)[\'"])',
+    re.DOTALL
+)
+
+# One TextWrapper per description width, reused across table rows
+_WRAPPERS: Dict[int, textwrap.TextWrapper] = {}
+
+def _wrap(text: str, width: int) -> List[str]:
+    """Wrap text like textwrap.wrap, reusing the wrapper for each width"""
+    wrapper = _WRAPPERS.get(width)
+    if wrapper is None:
+        wrapper = _WRAPPERS[width] = textwrap.TextWrapper(width=width)
+    return wrapper.wrap(text)
 
 @dataclass
 class RemoteModule:
@@ -39,25 +62,25 @@ class ModuleShop:
             from .module_cache import ModuleCache
             cached_modules = ModuleCache.get_cached_modules()
             
-            modules_dir = Path(__file__).parent.parent / 'modules'
+            # One scan of the modules directory instead of stat'ing every module file
+            downloaded = StateCache.downloaded_modules()
             
             for module in cached_modules:
                 name = module["name"]
                 category = module["category"]
                 
                 # Check if module exists in its category directory
-                module_path = None
                 if category != "Uncategorized":
-                    module_path = modules_dir / category / f"{module['filename']}"
+                    module_file = f"{category}/{module['filename']}"
                 else:
-                    module_path = modules_dir / module['filename']
+                    module_file = module['filename']
                 
                 self.modules[name.lower()] = RemoteModule(
                     name=name,
                     description=module["description"],
                     category=category,
                     url=module["url"],
-                    downloaded=module_path.exists() if module_path else False
+                    downloaded=module_file in downloaded
                 )
                 
         except Exception as e:
@@ -73,18 +96,22 @@ class ModuleShop:
         category = "Uncategorized"
         
         try:
-            # Look for category in _get_category()
-            if "_get_category" in content:
-                cat_match = re.search(r'def\s+_get_category.*?return\s+[\'"](.+?)[\'"]', content, re.DOTALL)
-                if cat_match:
-                    category = cat_match.group(1)
+            # Look for category in _get_category() and description in _get_description()
+            has_description = "_get_description" in content
+            if has_description or "_get_category" in content:
+                found_cat = found_desc = False
+                for match in _META_RE.finditer(content):
+                    if match.group('cat') is not None and not found_cat:
+                        category = match.group('cat')
+                        found_cat = True
+                    elif match.group('desc') is not None and not found_desc:
+                        description = match.group('desc')
+                        found_desc = True
+                    if found_cat and found_desc:
+                        break
             
-            # Look for description in _get_description() or docstring
-            if "_get_description" in content:
-                desc_match = re.search(r'def\s+_get_description.*?return\s+[\'"](.+?)[\'"]', content, re.DOTALL)
-                if desc_match:
-                    description = desc_match.group(1)
-            elif '"""' in content:
+            # Fall back to the docstring for the description
+            if not has_description and '"""' in content:
                 doc_start = content.find('"""') + 3
                 doc_end = content.find('"""', doc_start)
                 if doc_end > doc_start:
@@ -129,15 +156,21 @@ class ModuleShop:
                 print(f"{Colors.WARNING}[!] Module already downloaded at {module_path}{Colors.ENDC}")
                 return True
 
-            # Download module
-            response = requests.get(module.url)
-            response.raise_for_status()
-            
-            # Save module
-            with open(module_path, 'wb') as f:
-                f.write(response.content)
+            # Stream the module to a temporary file so a failed download never looks installed
+            tmp_path = module_path.with_suffix('.py.part')
+            try:
+                with _HTTP.get(module.url, stream=True, timeout=30) as response:
+                    response.raise_for_status()
+                    with open(tmp_path, 'wb') as f:
+                        for chunk in response.iter_content(chunk_size=65536):
+                            f.write(chunk)
+                os.replace(tmp_path, module_path)
+            finally:
+                if tmp_path.exists():
+                    tmp_path.unlink()
             
             module.downloaded = True
+            StateCache.invalidate_modules()
             print(f"{Colors.GREEN}[✓] Module downloaded successfully to {module_path}{Colors.ENDC}")
 
             # Reload modules in the framework
@@ -190,64 +223,81 @@ class ModuleShop:
             return
         total_items = len(modules_to_show)
         total_pages = (total_items + items_per_page - 1) // items_per_page
-        if page > total_pages:
-            page = total_pages
-        start_idx = (page - 1) * items_per_page
-        end_idx = min(start_idx + items_per_page, total_items)
-        # Get current page's modules
-        current_modules = modules_to_show[start_idx:end_idx]
-        # Calculate description width for current page
-        desc_width = self._calculate_description_width(current_modules)
-        # Draw table header
-        print(self._create_table_border(desc_width, "╔"))
-        print(f"{Colors.CYAN}║ {Colors.ACCENT}{'Name':<16} {Colors.CYAN}║", end='')
-        print(f" {Colors.ACCENT}{'Status':<15} {Colors.CYAN}║", end='')
-        print(f" {Colors.ACCENT}{'Description':<{desc_width}} {Colors.CYAN}║", end='')
-        print(f" {Colors.ACCENT}{'Category':<16} {Colors.CYAN}║")
-        print(self._create_table_border(desc_width, "╠"))
-        # Draw module rows
-        for i, module in enumerate(current_modules):
-            status = f"{Colors.GREEN}Downloaded {Colors.ENDC}" if module.downloaded else f"{Colors.WARNING}Not Downloaded {Colors.ENDC}"
-            # First line with all columns
-            print(f"{Colors.CYAN}║ {Colors.TEXT}{module.name:<16} {Colors.CYAN}║", end='')
-            print(f" {status:<24}{Colors.CYAN} ║", end='')
-            # Handle multiline descriptions
-            desc_lines = textwrap.wrap(module.description, desc_width)
-            if not desc_lines:
-                desc_lines = ['']
-            # First line of description
-            print(f" {Colors.TEXT}{desc_lines[0]:<{desc_width}} {Colors.CYAN}║", end='')
-            print(f" {Colors.TEXT}{module.category:<16} {Colors.CYAN}║")
-            # Additional description lines
-            for line in desc_lines[1:]:
-                print(f"{Colors.CYAN}║ {' '*16} ║ {' '*15} ║", end='')
-                print(f" {Colors.TEXT}{line:<{desc_width}} {Colors.CYAN}║", end='')
-                print(f" {' '*16} ║")
-            # Separator between modules
-            if i < len(current_modules) - 1:
-                print(self._create_separator_line(desc_width))
-        # Table footer
-        print(self._create_table_border(desc_width, "╚"))
+        CYAN, TEXT, ACCENT, WARNING, ENDC = Colors.CYAN, Colors.TEXT, Colors.ACCENT, Colors.WARNING, Colors.ENDC
+        downloaded_status = f"{Colors.GREEN}Downloaded {ENDC}"
+        missing_status = f"{WARNING}Not Downloaded {ENDC}"
+        # Borders only depend on the description width, share them between pages
+        border_cache: Dict[int, Tuple[str, str, str, str]] = {}
         
-        # Show pagination info
-        if total_pages > 1:
-            print(f"\n{Colors.WARNING}Page {page}/{total_pages} ({total_items} total modules){Colors.ENDC}")
-            print(f"{Colors.TEXT}Use 'n' for next page, 'p' for previous, any other key to exit{Colors.ENDC}")
+        while True:
+            if page > total_pages:
+                page = total_pages
+            start_idx = (page - 1) * items_per_page
+            end_idx = min(start_idx + items_per_page, total_items)
+            # Get current page's modules
+            current_modules = modules_to_show[start_idx:end_idx]
+            # Calculate description width for current page
+            desc_width = self._calculate_description_width(current_modules)
+            if desc_width not in border_cache:
+                border_cache[desc_width] = (
+                    self._create_table_border(desc_width, "╔"),
+                    self._create_table_border(desc_width, "╠"),
+                    self._create_table_border(desc_width, "╚"),
+                    self._create_separator_line(desc_width)
+                )
+            top_border, mid_border, bottom_border, separator = border_cache[desc_width]
+            write = sys.stdout.write
+            # Draw table header
+            write(f"{top_border}\n")
+            write(f"{CYAN}║ {ACCENT}{'Name':<16} {CYAN}║ {ACCENT}{'Status':<15} {CYAN}║ "
+                  f"{ACCENT}{'Description':<{desc_width}} {CYAN}║ {ACCENT}{'Category':<16} {CYAN}║\n")
+            write(f"{mid_border}\n")
+            # Draw module rows
+            for i, module in enumerate(current_modules):
+                status = downloaded_status if module.downloaded else missing_status
+                # Handle multiline descriptions
+                desc_lines = _wrap(module.description, desc_width)
+                if not desc_lines:
+                    desc_lines = ['']
+                # First line with all columns
+                write(f"{CYAN}║ {TEXT}{module.name:<16} {CYAN}║ {status:<24}{CYAN} ║ "
+                      f"{TEXT}{desc_lines[0]:<{desc_width}} {CYAN}║ {TEXT}{module.category:<16} {CYAN}║\n")
+                # Additional description lines
+                for line in desc_lines[1:]:
+                    write(f"{CYAN}║ {' '*16} ║ {' '*15} ║ {TEXT}{line:<{desc_width}} {CYAN}║ {' '*16} ║\n")
+                # Separator between modules
+                if i < len(current_modules) - 1:
+                    write(f"{separator}\n")
+            # Table footer
+            write(f"{bottom_border}\n")
+            sys.stdout.flush()
+            
+            # Show pagination info
+            if total_pages <= 1:
+                break
+            print(f"\n{WARNING}Page {page}/{total_pages} ({total_items} total modules){ENDC}")
+            print(f"{TEXT}Use 'n' for next page, 'p' for previous, any other key to exit{ENDC}")
             key = input().lower()
             if key == 'n' and page < total_pages:
-                self._display_modules_table(modules_to_show, page + 1, items_per_page)
+                page += 1
             elif key == 'p' and page > 1:
-                self._display_modules_table(modules_to_show, page - 1, items_per_page)
+                page -= 1
+            else:
+                break
 
     def show_category(self, category: str = None) -> None:
         """Display modules in a category"""
         if category == "category":
-            # Show all categories
-            categories = {module.category for module in self.modules.values()}
+            # Show all categories, counted case-insensitively in a single pass
+            counts = Counter()
+            display_names = {}
+            for module in self.modules.values():
+                key = module.category.lower()
+                counts[key] += 1
+                display_names.setdefault(key, module.category)
             print(f"\n{Colors.SUCCESS}[*] Available categories:{Colors.ENDC}")
-            for cat in sorted(categories):
-                count = sum(1 for m in self.modules.values() if m.category.lower() == cat.lower())
-                print(f"{Colors.CYAN}[+] {cat}: {count} modules{Colors.ENDC}")
+            for cat in sorted(display_names.values()):
+                print(f"{Colors.CYAN}[+] {cat}: {counts[cat.lower()]} modules{Colors.ENDC}")
             return
             
         # Show modules in category
@@ -1,9 +1,43 @@
-import paramiko
-import getpass
-from pathlib import Path
+import functools
 import os
-from typing import Optional, Tuple, Callable
+import re
+import select
+import shlex
+import shutil
+import subprocess
+import sys
+import tarfile
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional, Tuple, Callable, List, TYPE_CHECKING
 from dataclasses import dataclass
+from .ssh_pool import SSHConnectionPool, PooledConnection, PoolKey, default_pool
+
+# paramiko drags in cryptography and its C extensions, so it is only
+# imported once a connection is actually opened
+if TYPE_CHECKING:
+    import paramiko
+
+
+@functools.lru_cache(maxsize=32)
+def _parse_private_key(key_path: str, mtime: float) -> "paramiko.PKey":
+    """Parses a private key file once per modification time, trying each key type in turn"""
+    import paramiko
+    
+    error: Optional[Exception] = None
+    for key_class in (paramiko.RSAKey, paramiko.Ed25519Key, paramiko.ECDSAKey):
+        try:
+            return key_class.from_private_key_file(key_path)
+        except paramiko.SSHException as e:
+            error = e
+    raise error
+
+
+def _load_private_key(key_path: str) -> "paramiko.PKey":
+    """Returns the parsed private key at key_path, reusing it while the file is unchanged"""
+    return _parse_private_key(key_path, os.path.getmtime(key_path))
+
 
 @dataclass
 class SSHCredentials:
@@ -17,16 +51,66 @@ class SSHCredentials:
 class SSHManager:
     """Manages SSH connections and file operations for remote hosts"""
     
-    def __init__(self, max_attempts: int = 3):
+    # Channel reads: bytes per recv() and the longest wait between checks
+    RECV_SIZE = 65536
+    SELECT_TIMEOUT = 1.0
+    # SFTP flow control: a bigger window and packets keep more requests in flight
+    SFTP_WINDOW_SIZE = 4 * 1024 * 1024
+    SFTP_MAX_PACKET_SIZE = 256 * 1024
+    SFTP_CHUNK_SIZE = 1024 * 1024
+    # Minimum seconds between two redraws of the default progress line
+    PROGRESS_INTERVAL = 0.1
+    # Seconds between keepalive packets, so idle pooled connections survive NAT and firewall timeouts
+    KEEPALIVE_INTERVAL = 30
+    # OpenSSH control socket used when prefer_openssh_mux is enabled
+    CONTROL_PATH = "~/.ssh/cm-%r@%h:%p"
+    CONTROL_PERSIST = "60s"
+    
+    def __init__(self, max_attempts: int = 3, pool: Optional[SSHConnectionPool] = None, prefer_openssh_mux: bool = False,
+                 compress: bool = False):
         self.max_attempts = max_attempts
-        self._ssh: Optional[paramiko.SSHClient] = None
+        # Negotiate zlib on new transports: pays off for text heavy transfers over slow links
+        self.compress = compress
+        # Run non-sudo commands through a multiplexed OpenSSH master instead of paramiko
+        self.prefer_openssh_mux = prefer_openssh_mux
+        self._credentials: Optional[SSHCredentials] = None
+        self._control_path: Optional[str] = None
+        # A master that failed to start is not retried until the next connect()
+        self._control_failed = False
+        self._ssh: Optional["paramiko.SSHClient"] = None
         self._sudo_password: Optional[str] = None
+        self._pool = pool if pool is not None else default_pool
+        # Only a pool given explicitly is used for connect()/close(); the default one
+        # serves the bulk copy_to_hosts/execute_on_hosts transfers
+        self._reuse_connections = pool is not None
+        self._pool_key: Optional[PoolKey] = None
+        self._sftp: Optional["paramiko.SFTPClient"] = None
 
     @property 
     def is_connected(self) -> bool:
         """Check if there's an active SSH connection"""
         return self._ssh is not None and self._ssh.get_transport() is not None
 
+    @property
+    def sftp(self) -> "paramiko.SFTPClient":
+        """SFTP client reused across transfers, reopened if its channel died"""
+        if self._sftp is not None:
+            channel = self._sftp.get_channel()
+            if channel is not None and not channel.closed and channel.get_transport().is_active():
+                return self._sftp
+            self._close_sftp()
+        self._sftp = self._open_sftp(self._ssh.get_transport())
+        return self._sftp
+
+    def _close_sftp(self) -> None:
+        """Closes the cached SFTP client"""
+        if self._sftp is not None:
+            try:
+                self._sftp.close()
+            except Exception:
+                pass
+            self._sftp = None
+
     def connect(self, credentials: SSHCredentials) -> Tuple[bool, Optional[str]]:
         """
         Establishes SSH connection and verifies sudo access
@@ -37,6 +121,26 @@ class SSHManager:
         Returns:
             Tuple[bool, Optional[str]]: (Success status, Error message if any)
         """
+        import getpass
+        import paramiko
+        
+        self._credentials = credentials
+        self._control_path = None
+        self._control_failed = False
+        self._close_sftp()
+        
+        # Reuse an authenticated connection with the same login and settings if one is idle
+        pool_key = SSHConnectionPool.key_for(credentials, self.compress) if self._reuse_connections else None
+        pooled = self._pool.get(pool_key) if pool_key is not None else None
+        if pooled is not None:
+            self._ssh = pooled.client
+            self._pool_key = pool_key
+            print("Reusing established SSH connection.")
+            # The sudo password is not pooled, so it is asked for again
+            if not self._verify_sudo_access():
+                return False, "Failed to verify sudo access"
+            return True, None
+        
         attempts = 0
         while attempts < self.max_attempts:
             try:
@@ -46,7 +150,8 @@ class SSHManager:
                 if credentials.use_password:
                     password = getpass.getpass(f"SSH Password (attempt {attempts + 1}/{self.max_attempts}): ")
                     try:
-                        self._ssh.connect(credentials.host, username=credentials.user, password=password)
+                        self._ssh.connect(credentials.host, username=credentials.user, password=password,
+                                          compress=self.compress)
                         print("SSH connection established successfully.")
                     except paramiko.AuthenticationException:
                         print("Error: Invalid SSH password.")
@@ -56,19 +161,22 @@ class SSHManager:
                         continue
                 elif credentials.key_path:
                     try:
-                        key = paramiko.RSAKey.from_private_key_file(credentials.key_path)
-                        self._ssh.connect(credentials.host, username=credentials.user, pkey=key)
+                        key = _load_private_key(credentials.key_path)
+                        self._ssh.connect(credentials.host, username=credentials.user, pkey=key, compress=self.compress)
                         print("SSH connection established successfully using private key.")
                     except (paramiko.SSHException, IOError) as e:
                         return False, f"Private key error: {str(e)}"
                 else:
-                    self._ssh.connect(credentials.host, username=credentials.user)
+                    self._ssh.connect(credentials.host, username=credentials.user, compress=self.compress)
                     print("SSH connection established successfully.")
                 
+                self._ssh.get_transport().set_keepalive(self.KEEPALIVE_INTERVAL)
+                
                 # Verify sudo access
                 if not self._verify_sudo_access():
                     return False, "Failed to verify sudo access"
                     
+                self._pool_key = pool_key
                 return True, None
                 
             except paramiko.SSHException as e:
@@ -87,6 +195,8 @@ class SSHManager:
         Returns:
             bool: True if sudo access is verified, False otherwise
         """
+        import getpass
+        
         sudo_attempts = 0
         while sudo_attempts < self.max_attempts:
             try:
@@ -95,8 +205,7 @@ class SSHManager:
                 )
                 
                 channel = self._ssh.get_transport().open_session()
-                channel.get_pty()
-                channel.exec_command(f"echo '{self._sudo_password}' | sudo -S echo 'sudo test'")
+                self._exec_sudo(channel, "echo 'sudo test'")
                 
                 exit_status = channel.recv_exit_status()
                 if exit_status == 0:
@@ -115,6 +224,100 @@ class SSHManager:
         
         return False
 
+    def _open_channel(self) -> "paramiko.Channel":
+        """
+        Opens a session channel, reconnecting once if the transport was dropped
+        
+        Only key or agent based logins are reopened; password ones raise as before.
+        """
+        import paramiko
+        
+        transport = self._ssh.get_transport()
+        if transport is not None and transport.is_active():
+            try:
+                return transport.open_session()
+            except (EOFError, OSError, paramiko.SSHException):
+                pass
+        
+        conn = self._connect_unattended(self._credentials, self.compress) if self._credentials else None
+        if conn is None:
+            raise RuntimeError("SSH connection was lost")
+        print("SSH connection lost, reconnected.")
+        self._close_sftp()
+        self._ssh.close()
+        self._ssh = conn.client
+        return self._ssh.get_transport().open_session()
+
+    def _exec_sudo(self, channel: "paramiko.Channel", command: str) -> bytearray:
+        """
+        Runs command under sudo on a pty, feeding the password through the channel
+        
+        The pty is kept for hosts with 'Defaults requiretty' and for tools that
+        expect a terminal. Echo is turned off and a marker printed before the
+        password is sent, so the password never shows up in the output; -k makes
+        sudo always read it instead of leaving it for the command. A pty never
+        closes stdin, so the password is followed by an end-of-file (Ctrl+D):
+        a wrong password makes sudo fail at once instead of waiting for another.
+        
+        Returns:
+            bytearray: Output received after the marker, to prepend to the rest
+        """
+        marker = f"__SUDO_{os.urandom(4).hex()}".encode()
+        channel.get_pty()
+        channel.exec_command(f"stty -echo; echo {marker.decode()}; sudo -S -k -p '' {command}")
+        
+        buf = bytearray()
+        while marker + b"\r\n" not in buf and marker + b"\n" not in buf:
+            select.select([channel], [], [], self.SELECT_TIMEOUT)
+            if channel.recv_ready():
+                buf.extend(channel.recv(self.RECV_SIZE))
+            elif channel.exit_status_ready():
+                return buf
+        channel.sendall((self._sudo_password + '\n\x04').encode())
+        return buf[buf.index(marker) + len(marker):].lstrip(b"\r\n")
+
+    def _ensure_control_socket(self) -> Optional[str]:
+        """
+        Starts (or reuses) an OpenSSH ControlMaster for the current host
+        
+        Only key or agent based logins can be multiplexed, since the master
+        runs in batch mode without prompting.
+        
+        Returns:
+            Optional[str]: Control socket path, or None if OpenSSH multiplexing is unavailable
+        """
+        if self._control_path:
+            return self._control_path
+        credentials = self._credentials
+        if self._control_failed or credentials is None or credentials.use_password or not shutil.which("ssh"):
+            return None
+            
+        control_path = os.path.expanduser(self.CONTROL_PATH)
+        target = f"{credentials.user}@{credentials.host}"
+        try:
+            check = subprocess.run(
+                ["ssh", "-S", control_path, "-O", "check", target],
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            )
+            if check.returncode != 0:
+                master = ["ssh", "-MNf",
+                          "-o", "ControlMaster=yes",
+                          "-o", f"ControlPath={control_path}",
+                          "-o", f"ControlPersist={self.CONTROL_PERSIST}",
+                          "-o", "BatchMode=yes"]
+                if credentials.key_path:
+                    master += ["-i", credentials.key_path]
+                started = subprocess.run(master + [target], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                if started.returncode != 0:
+                    self._control_failed = True
+                    return None
+        except Exception:
+            self._control_failed = True
+            return None
+            
+        self._control_path = control_path
+        return control_path
+
     def execute_command(self, command: str, use_sudo: bool = False) -> Tuple[int, str, str]:
         """
         Executes a command on the remote host
@@ -129,36 +332,111 @@ class SSHManager:
         if not self.is_connected:
             raise RuntimeError("No active SSH connection")
             
+        # Plain commands can skip paramiko and go through the multiplexed OpenSSH master
+        if self.prefer_openssh_mux and not use_sudo:
+            control_path = self._ensure_control_socket()
+            if control_path:
+                try:
+                    result = subprocess.run(
+                        ["ssh", "-S", control_path, "-o", "BatchMode=yes",
+                         f"{self._credentials.user}@{self._credentials.host}", command],
+                        capture_output=True
+                    )
+                    return (result.returncode,
+                            result.stdout.decode('utf-8', errors='replace'),
+                            result.stderr.decode('utf-8', errors='replace'))
+                except Exception as e:
+                    return -1, "", str(e)
+            
         try:
-            channel = self._ssh.get_transport().open_session()
-            channel.get_pty()
+            channel = self._open_channel()
             
             if use_sudo:
                 if not self._sudo_password:
                     raise RuntimeError("Sudo password not available")
-                command = f"echo '{self._sudo_password}' | sudo -S {command}"
-                
-            channel.exec_command(command)
+                head = self._exec_sudo(channel, command)
+            else:
+                head = bytearray()
+                channel.get_pty()
+                channel.exec_command(command)
             
-            # Capture output
-            stdout = ""
-            stderr = ""
-            while True:
-                if channel.recv_ready():
-                    stdout += channel.recv(4096).decode('utf-8')
-                if channel.recv_stderr_ready():
-                    stderr += channel.recv_stderr(4096).decode('utf-8')
-                if channel.exit_status_ready() and not (channel.recv_ready() or channel.recv_stderr_ready()):
-                    break
-                    
-            exit_status = channel.recv_exit_status()
+            exit_status, out_buf, err_buf = self._read_channel(channel)
             channel.close()
             
-            return exit_status, stdout, stderr
+            # Decode once so multibyte characters split across reads stay intact
+            out_buf[:0] = head
+            return exit_status, out_buf.decode('utf-8', errors='replace'), err_buf.decode('utf-8', errors='replace')
             
         except Exception as e:
             return -1, "", str(e)
 
+    def execute_batch(self, commands: List[str]) -> List[Tuple[int, str, str]]:
+        """
+        Executes several commands in order over a single channel
+        
+        The commands are fed to one remote shell, each followed by a marker
+        carrying its exit status, so only one channel is opened for all of
+        them. Commands run without stdin and without sudo.
+        
+        Args:
+            commands: Commands to execute
+            
+        Returns:
+            List[Tuple[int, str, str]]: (Exit status, stdout, stderr) of every command
+        """
+        if not self.is_connected:
+            raise RuntimeError("No active SSH connection")
+        if not commands:
+            return []
+            
+        marker = f"__END_{os.urandom(4).hex()}"
+        script = "".join(
+            f'{{ {command}\n}} </dev/null\necho "{marker}_{i}:$?"\necho "{marker}_{i}" >&2\n'
+            for i, command in enumerate(commands)
+        )
+        try:
+            channel = self._open_channel()
+            channel.exec_command("sh")
+            channel.sendall(script.encode())
+            channel.shutdown_write()
+            _, out_buf, err_buf = self._read_channel(channel)
+            channel.close()
+        except Exception as e:
+            return [(-1, "", str(e))] * len(commands)
+            
+        # Split the combined output at the markers written after every command
+        outputs = []
+        pos = 0
+        for match in re.finditer(rb"%s_\d+:(\d+)\n" % marker.encode(), out_buf):
+            outputs.append((int(match.group(1)), out_buf[pos:match.start()]))
+            pos = match.end()
+        # A command that killed the shell leaves the rest without a marker
+        outputs.append((-1, out_buf[pos:]))
+        outputs += [(-1, b"")] * (len(commands) - len(outputs))
+        errors = re.split(rb"%s_\d+\n" % marker.encode(), bytes(err_buf))
+        errors += [b""] * (len(commands) - len(errors))
+        
+        return [
+            (status, out.decode('utf-8', errors='replace'), err.decode('utf-8', errors='replace'))
+            for (status, out), err in zip(outputs[:len(commands)], errors)
+        ]
+
+    def _read_channel(self, channel: "paramiko.Channel") -> Tuple[int, bytearray, bytearray]:
+        """Reads a command's stdout and stderr until it exits, returning (exit status, stdout, stderr)"""
+        # Sleep on the channel until it has data instead of spinning
+        out_buf = bytearray()
+        err_buf = bytearray()
+        while True:
+            select.select([channel], [], [], self.SELECT_TIMEOUT)
+            if channel.recv_ready():
+                out_buf.extend(channel.recv(self.RECV_SIZE))
+            if channel.recv_stderr_ready():
+                err_buf.extend(channel.recv_stderr(self.RECV_SIZE))
+            if channel.exit_status_ready() and not (channel.recv_ready() or channel.recv_stderr_ready()):
+                break
+                
+        return channel.recv_exit_status(), out_buf, err_buf
+
     def upload_file(self, local_path: str, remote_path: str, callback: Optional[Callable] = None) -> bool:
         """
         Uploads a file to the remote host
@@ -175,13 +453,232 @@ class SSHManager:
             raise RuntimeError("No active SSH connection")
             
         try:
-            sftp = self._ssh.open_sftp()
-            sftp.put(local_path, remote_path, callback=callback)
+            self._put(self.sftp, local_path, remote_path, callback)
             return True
         except Exception as e:
             print(f"Error uploading file: {e}")
             return False
 
+    def _open_sftp(self, transport: "paramiko.Transport") -> "paramiko.SFTPClient":
+        """Opens an SFTP client on a transport with the tuned window and packet sizes"""
+        import paramiko
+        
+        return paramiko.SFTPClient.from_transport(
+            transport,
+            window_size=self.SFTP_WINDOW_SIZE,
+            max_packet_size=self.SFTP_MAX_PACKET_SIZE
+        )
+
+    def _put(self, sftp: "paramiko.SFTPClient", local_path: str, remote_path: str, callback: Optional[Callable] = None) -> None:
+        """Writes a local file to remote_path with pipelined chunks, raising on failure"""
+        total_size = os.path.getsize(local_path)
+        transferred = 0
+        
+        # Pipelined writes don't wait for each chunk to be acknowledged
+        with open(local_path, 'rb') as local_file, sftp.open(remote_path, 'wb') as remote_file:
+            remote_file.set_pipelined(True)
+            while True:
+                chunk = local_file.read(self.SFTP_CHUNK_SIZE)
+                if not chunk:
+                    break
+                remote_file.write(chunk)
+                transferred += len(chunk)
+                if callback:
+                    callback(transferred, total_size)
+        
+        remote_size = sftp.stat(remote_path).st_size
+        if remote_size != total_size:
+            raise IOError(f"size mismatch in put! {remote_size} != {total_size}")
+
+    def upload_many(self, pairs: List[Tuple[str, str]], max_workers: int = 8) -> List[bool]:
+        """
+        Uploads several files to the remote host concurrently
+        
+        Each worker opens its own SFTP channel on the current connection, so
+        no extra authentication is needed.
+        
+        Args:
+            pairs: (local_path, remote_path) tuples
+            max_workers: Maximum number of concurrent transfers
+            
+        Returns:
+            List[bool]: Success status of each pair, in order
+        """
+        if not self.is_connected:
+            raise RuntimeError("No active SSH connection")
+        if not pairs:
+            return []
+            
+        transport = self._ssh.get_transport()
+        local = threading.local()
+        opened: List["paramiko.SFTPClient"] = []
+        opened_lock = threading.Lock()
+        
+        def upload(pair: Tuple[str, str]) -> bool:
+            local_path, remote_path = pair
+            try:
+                sftp = getattr(local, 'sftp', None)
+                if sftp is None:
+                    sftp = local.sftp = self._open_sftp(transport)
+                    with opened_lock:
+                        opened.append(sftp)
+                self._put(sftp, local_path, remote_path)
+                return True
+            except Exception as e:
+                print(f"Error uploading {local_path}: {e}")
+                return False
+        
+        try:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(pairs))) as executor:
+                return list(executor.map(upload, pairs))
+        finally:
+            for sftp in opened:
+                try:
+                    sftp.close()
+                except Exception:
+                    pass
+
+    def upload_archive(self, local_dir: str, names: List[str], remote_dir: str) -> bool:
+        """
+        Uploads several files as one gzip compressed tar stream unpacked on the remote host
+        
+        The whole set travels over a single channel instead of paying an SFTP
+        open and acknowledgement per file, and text files shrink on the wire.
+        
+        Args:
+            local_dir: Local directory the names are relative to
+            names: Files or directories inside local_dir to send
+            remote_dir: Existing remote directory to extract into
+            
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        if not self.is_connected:
+            raise RuntimeError("No active SSH connection")
+            
+        try:
+            channel = self._open_channel()
+            channel.exec_command(f"tar xzf - -C {shlex.quote(remote_dir)}")
+            # Stream mode ('w|gz') compresses and sends as it reads, nothing is staged locally
+            with channel.makefile('wb') as stream, tarfile.open(fileobj=stream, mode='w|gz') as tar:
+                for name in names:
+                    tar.add(os.path.join(local_dir, name), arcname=name)
+            channel.shutdown_write()
+            
+            exit_status, _, err_buf = self._read_channel(channel)
+            channel.close()
+            if exit_status != 0:
+                print(f"Error uploading archive: {err_buf.decode('utf-8', errors='replace').strip()}")
+                return False
+            return True
+            
+        except Exception as e:
+            print(f"Error uploading archive: {e}")
+            return False
+
+    @staticmethod
+    def _connect_unattended(credentials: SSHCredentials, compress: bool = False) -> Optional[PooledConnection]:
+        """Opens a key or agent authenticated connection without prompting, or returns None"""
+        if credentials.use_password:
+            return None
+        import paramiko
+        
+        client = paramiko.SSHClient()
+        client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        try:
+            if credentials.key_path:
+                key = _load_private_key(credentials.key_path)
+                client.connect(credentials.host, username=credentials.user, pkey=key, compress=compress)
+            else:
+                client.connect(credentials.host, username=credentials.user, compress=compress)
+            client.get_transport().set_keepalive(SSHManager.KEEPALIVE_INTERVAL)
+        except Exception:
+            client.close()
+            return None
+        return PooledConnection(client)
+
+    def copy_to_hosts(self, hosts: List[SSHCredentials], local_path: str, remote_path: str,
+                      max_workers: Optional[int] = None) -> List[Future]:
+        """
+        Uploads the same file to several hosts concurrently
+        
+        Connections are borrowed from the pool, opening key or agent
+        authenticated ones for hosts that have none idle. Password based
+        credentials can't be used unattended and fail.
+        
+        Args:
+            hosts: Credentials of every target host
+            local_path: Path to local file
+            remote_path: Path where to store file on each host
+            max_workers: Maximum number of concurrent transfers (defaults to the pool size)
+            
+        Returns:
+            List[Future]: One future per host resolving to its success status
+        """
+        def copy(credentials: SSHCredentials) -> bool:
+            key = SSHConnectionPool.key_for(credentials, self.compress)
+            try:
+                with self._pool.acquire(key, lambda: self._connect_unattended(credentials, self.compress)) as conn:
+                    if conn is None:
+                        print(f"Error connecting to {credentials.host}: unattended login not possible")
+                        return False
+                    sftp = self._open_sftp(conn.client.get_transport())
+                    try:
+                        self._put(sftp, local_path, remote_path)
+                    finally:
+                        sftp.close()
+                return True
+            except Exception as e:
+                print(f"Error uploading to {credentials.host}: {e}")
+                return False
+        
+        if not hosts:
+            return []
+        executor = ThreadPoolExecutor(max_workers=min(max_workers or self._pool.max_connections, len(hosts)))
+        futures = [executor.submit(copy, credentials) for credentials in hosts]
+        executor.shutdown(wait=False)
+        return futures
+
+    def execute_on_hosts(self, hosts: List[SSHCredentials], command: str,
+                         max_workers: Optional[int] = None) -> List[Future]:
+        """
+        Executes the same command on several hosts concurrently
+
+        Connections are borrowed from the pool like in copy_to_hosts, so
+        password based credentials can't be used and fail. Commands run
+        without a pty and without sudo.
+
+        Args:
+            hosts: Credentials of every target host
+            command: Command to execute
+            max_workers: Maximum number of concurrent commands (defaults to the pool size)
+
+        Returns:
+            List[Future]: One future per host resolving to its (exit status, stdout, stderr)
+        """
+        def run(credentials: SSHCredentials) -> Tuple[int, str, str]:
+            key = SSHConnectionPool.key_for(credentials, self.compress)
+            try:
+                with self._pool.acquire(key, lambda: self._connect_unattended(credentials, self.compress)) as conn:
+                    if conn is None:
+                        return -1, "", f"Error connecting to {credentials.host}: unattended login not possible"
+                    channel = conn.client.get_transport().open_session()
+                    try:
+                        channel.exec_command(command)
+                        exit_status, out_buf, err_buf = self._read_channel(channel)
+                    finally:
+                        channel.close()
+                return exit_status, out_buf.decode('utf-8', errors='replace'), err_buf.decode('utf-8', errors='replace')
+            except Exception as e:
+                return -1, "", str(e)
+
+        if not hosts:
+            return []
+        executor = ThreadPoolExecutor(max_workers=min(max_workers or self._pool.max_connections, len(hosts)))
+        futures = [executor.submit(run, credentials) for credentials in hosts]
+        executor.shutdown(wait=False)
+        return futures
+
     def download_file(self, remote_path: str, local_path: str, callback: Optional[Callable] = None) -> bool:
         """
         Downloads a file from the remote host
@@ -201,7 +698,7 @@ class SSHManager:
             # Ensure local directory exists
             os.makedirs(os.path.dirname(local_path), exist_ok=True)
             
-            sftp = self._ssh.open_sftp()
+            sftp = self.sftp
             
             # Get remote file size for progress tracking
             remote_stat = sftp.stat(remote_path)
@@ -211,12 +708,31 @@ class SSHManager:
             
             # Use provided callback or default progress callback
             if not callback:
+                last = [0.0]
                 def default_callback(transferred: int, total: int):
+                    now = time.monotonic()
+                    if now - last[0] < self.PROGRESS_INTERVAL and transferred != total:
+                        return
+                    last[0] = now
                     percentage = (transferred / total) * 100
-                    print(f"Progress: {percentage:.2f}%", end='\r')
+                    sys.stdout.write(f"Progress: {percentage:.2f}%\r")
+                    sys.stdout.flush()
                 callback = default_callback
             
-            sftp.get(remote_path, local_path, callback=callback)
+            # Prefetch keeps read requests for the whole file in flight
+            transferred = 0
+            with sftp.open(remote_path, 'rb') as remote_file, open(local_path, 'wb') as local_file:
+                remote_file.prefetch(total_size)
+                while True:
+                    chunk = remote_file.read(self.SFTP_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    local_file.write(chunk)
+                    transferred += len(chunk)
+                    callback(transferred, total_size)
+            
+            if transferred != total_size:
+                raise IOError(f"size mismatch in get! {transferred} != {total_size}")
             print("\nDownload completed successfully!")
             return True
             
@@ -225,11 +741,16 @@ class SSHManager:
             return False
 
     def close(self):
-        """Closes the SSH connection"""
+        """Releases the SSH connection back to an explicitly given pool, or closes it"""
+        self._close_sftp()
         if self._ssh:
             try:
-                self._ssh.close()
-                self._ssh = None
-                self._sudo_password = None
+                if self._pool_key is not None:
+                    self._pool.put(self._pool_key, PooledConnection(self._ssh))
+                else:
+                    self._ssh.close()
             except:
-                pass
\ No newline at end of file
+                pass
+            self._ssh = None
+            self._sudo_password = None
+            self._pool_key = None
\ No newline at end of file
@@ -0,0 +1,118 @@
+"""
+Pool of authenticated SSH connections shared by SSHManager instances
+"""
+import atexit
+import threading
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Deque, Iterator, Optional, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import paramiko
+    from .ssh_manager import SSHCredentials
+
+# (host, user, key_path, use_password, compress)
+PoolKey = Tuple[str, str, Optional[str], bool, bool]
+
+
+@dataclass
+class PooledConnection:
+    """An authenticated SSH client, the sudo password never goes into the pool"""
+    client: "paramiko.SSHClient"
+
+    @property
+    def is_alive(self) -> bool:
+        """Check the transport is still up with a cheap SSH_MSG_IGNORE round"""
+        transport = self.client.get_transport()
+        if transport is None or not transport.is_active():
+            return False
+        try:
+            transport.send_ignore()
+            return True
+        except Exception:
+            return False
+
+    def close(self) -> None:
+        """Close the underlying client"""
+        try:
+            self.client.close()
+        except Exception:
+            pass
+
+
+class SSHConnectionPool:
+    """Keeps idle authenticated SSH connections keyed by (host, user, key_path, use_password, compress)"""
+
+    def __init__(self, max_connections: int = 10):
+        # sshd's default MaxStartups is 10, stay within it
+        self.max_connections = max_connections
+        # Keys ordered from least to most recently released
+        self._idle: "OrderedDict[PoolKey, Deque[PooledConnection]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key_for(credentials: "SSHCredentials", compress: bool = False) -> PoolKey:
+        """Build the pool key of a set of credentials and the transport's compression"""
+        return credentials.host, credentials.user, credentials.key_path, credentials.use_password, compress
+
+    def get(self, key: PoolKey) -> Optional[PooledConnection]:
+        """Take a live idle connection for key, or None if there is none"""
+        while True:
+            with self._lock:
+                idle = self._idle.get(key)
+                if not idle:
+                    return None
+                conn = idle.pop()
+                if not idle:
+                    del self._idle[key]
+            if conn.is_alive:
+                return conn
+            conn.close()
+
+    def put(self, key: PoolKey, conn: PooledConnection) -> None:
+        """Return a connection to the pool, evicting the least recently used when full"""
+        if not conn.is_alive:
+            conn.close()
+            return
+
+        evicted = []
+        with self._lock:
+            self._idle.setdefault(key, deque()).append(conn)
+            self._idle.move_to_end(key)
+            while sum(len(idle) for idle in self._idle.values()) > self.max_connections:
+                lru_key = next(iter(self._idle))
+                lru = self._idle[lru_key]
+                evicted.append(lru.popleft())
+                if not lru:
+                    del self._idle[lru_key]
+
+        for old in evicted:
+            old.close()
+
+    @contextmanager
+    def acquire(self, key: PoolKey, factory: Callable[[], Optional[PooledConnection]]) -> Iterator[Optional[PooledConnection]]:
+        """Borrow a connection for key, creating one with factory if none is idle
+
+        The connection goes back to the pool when the block exits. factory may
+        return None when connecting fails, in which case None is yielded.
+        """
+        conn = self.get(key) or factory()
+        try:
+            yield conn
+        finally:
+            if conn is not None:
+                self.put(key, conn)
+
+    def close_all(self) -> None:
+        """Close every idle connection"""
+        with self._lock:
+            idle, self._idle = self._idle, OrderedDict()
+        for conns in idle.values():
+            for conn in conns:
+                conn.close()
+
+
+# Shared by every SSHManager unless one is given a pool explicitly
+default_pool = SSHConnectionPool()
+atexit.register(default_pool.close_all)
@@ -0,0 +1,139 @@
+"""
+Short-lived cache of external state shared by the session manager and the shop
+"""
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Dict, Optional, Set, Tuple
+from .terminal_management import TerminalManager
+
+
+class StateCache:
+    MODULES_DIR = Path(__file__).parent.parent / 'modules'
+    # Seconds a snapshot is reused before querying tmux or the filesystem again
+    TTL = 1.0
+
+    _tmux_ids: Set[int] = set()
+    _tmux_error: Optional[str] = None
+    _tmux_ts = 0.0
+    # Background 'tmux list-sessions' started by prefetch_tmux() and when it was spawned
+    _tmux_pending = None
+    _tmux_pending_ts = 0.0
+
+    _downloaded: Set[str] = set()
+    _downloaded_ts = 0.0
+
+    # First path of every name found in the PATH directories, and the PATH it was built from
+    _executables: Dict[str, str] = {}
+    _executables_path: Optional[str] = None
+    _executables_ts = 0.0
+
+    @classmethod
+    def tmux_ids(cls, max_age: float = None) -> Tuple[Set[int], Optional[str]]:
+        """Get the numeric IDs of the live tmux sessions and the listing error, if any"""
+        if max_age is None:
+            max_age = cls.TTL
+        now = time.monotonic()
+        if now - cls._tmux_ts >= max_age:
+            pending, cls._tmux_pending = cls._tmux_pending, None
+            if pending is not None and now - cls._tmux_pending_ts < max_age:
+                # The listing was already spawned, only its output is left to read
+                tmux_sessions, error = TerminalManager.collect_tmux_sessions(pending)
+                now = cls._tmux_pending_ts
+            else:
+                if pending is not None:
+                    TerminalManager.collect_tmux_sessions(pending)
+                tmux_sessions, error = TerminalManager.list_tmux_sessions()
+            # Only numerically named sessions belong to the framework
+            heads = (line.partition(':')[0].strip() for line in tmux_sessions if ':' in line)
+            cls._tmux_ids = set() if error else {int(head) for head in heads if head.isdigit()}
+            cls._tmux_error = error
+            cls._tmux_ts = now
+        return cls._tmux_ids, cls._tmux_error
+
+    @classmethod
+    def downloaded_modules(cls, max_age: float = None) -> Set[str]:
+        """Get the downloaded module files as paths relative to the modules directory
+
+        Top-level modules appear as 'name.py' and categorized ones as 'Category/name.py'.
+        """
+        if max_age is None:
+            max_age = cls.TTL
+        now = time.monotonic()
+        if now - cls._downloaded_ts >= max_age:
+            downloaded = set()
+            try:
+                with os.scandir(cls.MODULES_DIR) as it:
+                    for entry in it:
+                        if entry.is_dir():
+                            with os.scandir(entry.path) as sub:
+                                downloaded.update(f"{entry.name}/{e.name}" for e in sub if e.name.endswith(".py"))
+                        elif entry.name.endswith(".py"):
+                            downloaded.add(entry.name)
+            except OSError:
+                pass
+            cls._downloaded = downloaded
+            cls._downloaded_ts = now
+        return cls._downloaded
+
+    @classmethod
+    def invalidate_tmux(cls) -> None:
+        """Force the next tmux_ids() call to query tmux, dropping TerminalManager's listing too"""
+        cls._tmux_ts = 0.0
+        TerminalManager._sessions_cache = None
+        # A listing spawned before the change would bring the old state back
+        pending, cls._tmux_pending = cls._tmux_pending, None
+        if pending is not None:
+            TerminalManager.collect_tmux_sessions(pending)
+
+    @classmethod
+    def prefetch_tmux(cls) -> None:
+        """Start listing tmux sessions in the background for the next tmux_ids() call"""
+        if cls._tmux_pending is None:
+            cls._tmux_pending = TerminalManager.spawn_list_tmux_sessions()
+            cls._tmux_pending_ts = time.monotonic()
+
+    @classmethod
+    def invalidate_modules(cls) -> None:
+        """Force the next downloaded_modules() call to rescan the modules directory"""
+        cls._downloaded_ts = 0.0
+
+    @classmethod
+    def which(cls, name: str, max_age: float = None) -> Optional[str]:
+        """Locate an executable like shutil.which, using a snapshot of the PATH directories
+
+        The directories are listed once per snapshot instead of being probed for
+        every lookup, so checking many dependencies costs one scan of PATH.
+        """
+        if os.sep in name:
+            return shutil.which(name)
+        if max_age is None:
+            max_age = cls.TTL
+        path = os.environ.get('PATH', os.defpath)
+        now = time.monotonic()
+        if path != cls._executables_path or now - cls._executables_ts >= max_age:
+            executables = {}
+            for directory in path.split(os.pathsep):
+                try:
+                    with os.scandir(directory or os.curdir) as it:
+                        for entry in it:
+                            executables.setdefault(entry.name, entry.path)
+                except OSError:
+                    continue
+            cls._executables = executables
+            cls._executables_path = path
+            cls._executables_ts = now
+
+        candidate = cls._executables.get(name)
+        if candidate is None:
+            return None
+        if os.access(candidate, os.X_OK) and not os.path.isdir(candidate):
+            return candidate
+        # The first match isn't executable, one further along PATH may be
+        return shutil.which(name)
+
+    @classmethod
+    def invalidate_executables(cls) -> None:
+        """Force the next which() call to rescan the PATH directories"""
+        cls._executables_ts = 0.0
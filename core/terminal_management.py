@@ -1,19 +1,57 @@
 import subprocess
 import sys
 import platform
+import shutil
+import time
 from typing import Optional, Tuple
 from .colors import Colors
 
+# No cambian durante la vida del proceso
+_IS_WINDOWS = platform.system() == 'Windows'
+_TMUX_AVAILABLE = shutil.which('tmux') is not None
+
 
 class TerminalManager:
     """Gestiona las operaciones relacionadas con terminales y tmux"""
     
+    # Segundos durante los que se reutiliza la respuesta de list-sessions
+    CACHE_TTL = 0.5
+    _sessions_cache: Optional[Tuple[Tuple[list, Optional[str]], float]] = None
+    
+    @staticmethod
+    def invalidate_cache() -> None:
+        """Descarta las respuestas de tmux guardadas tras crear, cerrar o usar sesiones
+        
+        También invalida la instantánea de StateCache, que se construye a partir de
+        list-sessions, para que ambas vean siempre el mismo estado.
+        """
+        from .state_cache import StateCache
+        StateCache.invalidate_tmux()
+
+    @staticmethod
+    def has_session(session_name: str) -> bool:
+        """Comprueba si existe una sesión tmux
+        
+        Siempre pregunta a tmux: una respuesta guardada podría dar por viva una
+        sesión que acaba de cerrarse justo antes de conectarse a ella.
+        
+        Args:
+            session_name: Nombre de la sesión
+            
+        Returns:
+            bool: True si la sesión existe
+        """
+        result = subprocess.run(
+            ['tmux', 'has-session', '-t', session_name],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        )
+        return result.returncode == 0
+
     @staticmethod
     def check_tmux_installed() -> None:
         """Verifica que tmux esté instalado en el sistema"""
-        try:
-            subprocess.run(['tmux', '-V'], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        except FileNotFoundError:
+        if not _TMUX_AVAILABLE:
             print(f"{Colors.FAIL}[!] tmux is not installed. Please install it before continuing.{Colors.ENDC}")
             print(f"{Colors.CYAN}   - On Debian/Ubuntu: sudo apt install tmux{Colors.ENDC}")
             print(f"{Colors.CYAN}   - On Fedora: sudo dnf install tmux{Colors.ENDC}")
@@ -34,36 +72,21 @@ class TerminalManager:
             bool: True si la ejecución fue exitosa
         """
         try:
-            # Crear nueva sesión con terminal interactiva
+            # Crear la sesión (o atacharse a ella si ya existe), configurarla para
+            # modo interactivo con mouse y atacharse, todo en una sola llamada:
+            # tmux encadena comandos separados por ';'
             subprocess.run([
                 'tmux', 'new-session',
-                '-d',  # Detached
+                '-A',  # Reutilizar la sesión si ya existe
                 '-s', session_name,  # Nombre de sesión
                 '-n', window_name or 'main',  # Nombre de ventana
                 '-e', 'TERM=xterm-256color',  # Terminal type
                 '-e', 'LANG=en_US.UTF-8',     # Locale setting
-                cmd
-            ], check=True)
-
-            # Configurar la ventana para modo interactivo
-            subprocess.run([
-                'tmux', 'set-option', '-t', session_name,
-                'status-right', f'#{session_name}'
-            ], check=True)
-
-            # Habilitar mouse y otras opciones útiles
-            subprocess.run([
-                'tmux', 'set-window-option', '-t', session_name,
-                'mode-keys', 'vi'
-            ], check=True)
-
-            subprocess.run([
-                'tmux', 'set-option', '-t', session_name,
-                'mouse', 'on'
+                cmd, ';',
+                'set-option', '-t', session_name, 'status-right', f'#{session_name}', ';',
+                'set-window-option', '-t', session_name, 'mode-keys', 'vi', ';',
+                'set-option', '-t', session_name, 'mouse', 'on'
             ], check=True)
-
-            # Atachar a la sesión
-            subprocess.run(['tmux', 'attach', '-t', session_name], check=True)
             return True
 
         except subprocess.CalledProcessError as e:
@@ -72,6 +95,9 @@ class TerminalManager:
         except Exception as e:
             print(f"{Colors.FAIL}[!] Unexpected error: {e}{Colors.ENDC}")
             return False
+        finally:
+            # La sesión se creó y pudo terminar mientras estaba conectada
+            TerminalManager.invalidate_cache()
 
     @staticmethod
     def attach_to_tmux(session_name: str) -> bool:
@@ -84,12 +110,7 @@ class TerminalManager:
             bool: True si la conexión fue exitosa
         """
         try:
-            result = subprocess.run(
-                ['tmux', 'has-session', '-t', session_name],
-                capture_output=True
-            )
-            
-            if result.returncode == 0:
+            if TerminalManager.has_session(session_name):
                 subprocess.run(['tmux', 'attach-session', '-t', session_name])
                 return True
             else:
@@ -98,6 +119,9 @@ class TerminalManager:
         except Exception as e:
             print(f"{Colors.FAIL}[!] Error connecting to tmux session: {e}{Colors.ENDC}")
             return False
+        finally:
+            # La sesión pudo terminar mientras estaba conectada
+            TerminalManager.invalidate_cache()
 
     @staticmethod
     def detach_from_tmux() -> bool:
@@ -137,6 +161,8 @@ class TerminalManager:
             else:
                 print(f"{Colors.FAIL}[!] Error closing tmux session: {e}{Colors.ENDC}")
             return False
+        finally:
+            TerminalManager.invalidate_cache()
 
     @staticmethod
     def list_tmux_sessions() -> Tuple[list, Optional[str]]:
@@ -145,34 +171,71 @@ class TerminalManager:
         Returns:
             Tuple[list, Optional[str]]: Lista de sesiones y posible mensaje de error
         """
+        now = time.monotonic()
+        cached = TerminalManager._sessions_cache
+        if cached is not None and now - cached[1] < TerminalManager.CACHE_TTL:
+            return cached[0]
+            
         try:
             result = subprocess.run(
                 ['tmux', 'list-sessions'],
                 capture_output=True,
                 text=True
             )
-            
-            if result.returncode == 0:
-                return result.stdout.splitlines(), None
-            elif "no server running" in result.stderr:
-                return [], "There is no tmux server"
-            else:
-                return [], f"Error: {result.stderr}"
+            sessions = TerminalManager._parse_list_sessions(result.returncode, result.stdout, result.stderr)
+            TerminalManager._sessions_cache = (sessions, now)
+            return sessions
                 
         except Exception as e:
             return [], f"Error al listar sesiones: {e}"
 
     @staticmethod
-    def clear_screen() -> None:
-        """Limpia la pantalla según el sistema operativo"""
+    def spawn_list_tmux_sessions() -> Optional[subprocess.Popen]:
+        """Lanza 'tmux list-sessions' en segundo plano sin esperar a que termine
+        
+        Returns:
+            Optional[subprocess.Popen]: Proceso lanzado, o None si no se pudo lanzar
+        """
         try:
-            if platform.system() == 'Windows':
-                subprocess.run('cls', shell=True)
-            else:
-                # Intenta primero con el comando clear
-                result = subprocess.run('clear', shell=True)
-                if result.returncode != 0:
-                    # Si clear falla, usa secuencias de escape ANSI
-                    print('\033[2J\033[H', end='')
+            return subprocess.Popen(
+                ['tmux', 'list-sessions'],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True
+            )
+        except Exception:
+            return None
+
+    @staticmethod
+    def collect_tmux_sessions(process: subprocess.Popen) -> Tuple[list, Optional[str]]:
+        """Recoge la salida de un proceso lanzado con spawn_list_tmux_sessions
+        
+        Returns:
+            Tuple[list, Optional[str]]: Lista de sesiones y posible mensaje de error
+        """
+        try:
+            stdout, stderr = process.communicate()
+            return TerminalManager._parse_list_sessions(process.returncode, stdout, stderr)
         except Exception as e:
-            print(f"\n{Colors.FAIL}[!] Error clearing screen: {e}{Colors.ENDC}")
\ No newline at end of file
+            return [], f"Error al listar sesiones: {e}"
+
+    @staticmethod
+    def _parse_list_sessions(returncode: int, stdout: str, stderr: str) -> Tuple[list, Optional[str]]:
+        """Interpreta el resultado de 'tmux list-sessions'"""
+        if returncode == 0:
+            return stdout.splitlines(), None
+        elif "no server running" in stderr:
+            return [], "There is no tmux server"
+        else:
+            return [], f"Error: {stderr}"
+
+    @staticmethod
+    def clear_screen() -> None:
+        """Limpia la pantalla según el sistema operativo"""
+        if _IS_WINDOWS and not sys.stdout.isatty():
+            # cls es un comando interno de cmd, se invoca sin pasar por shell=True
+            subprocess.run(['cmd', '/c', 'cls'])
+            return
+        # Borra pantalla e historial (3J) y vuelve al inicio, sin lanzar procesos
+        sys.stdout.write('\x1b[2J\x1b[3J\x1b[H')
+        sys.stdout.flush()
\ No newline at end of file
@@ -2,43 +2,49 @@
 import sys
 import os
 import signal
-from pathlib import Path
 import subprocess
 from getpass import getpass
 from core.colors import Colors
 from core.terminal_management import TerminalManager
 
+# Directorio raíz del framework, fijo durante toda la ejecución
+_ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+
 def signal_handler(sig, frame):
     """Manejador de señal para Ctrl+C"""
     print("\n\n[!] Exiting the framework...")
     sys.exit(0)
 
+# Se marca cuando sudo ya fue validado en este proceso
+_sudo_validated = False
+
 def get_sudo_permission():
     """Obtiene permisos de sudo si es necesario"""
-    if os.geteuid() == 0:
+    global _sudo_validated
+    if _sudo_validated or os.geteuid() == 0:
         return True
             
     try:
-        # Intentamos ejecutar sudo -v para verificar si ya tenemos permisos de sudo
-        result = subprocess.run(['sudo', '-n', 'true'], capture_output=True)
+        # sudo -vn renueva las credenciales en caché sin ejecutar ningún comando ni preguntar
+        result = subprocess.run(['sudo', '-vn'], capture_output=True)
         if result.returncode == 0:
+            _sudo_validated = True
             return True
             
         print(f"{Colors.FAIL}[!] This framework requires administrator privileges{Colors.ENDC}")    
         # Si no tenemos permisos, pedimos la contraseña
         password = getpass("[?] Introduce your sudo password: ")
         
-        # Verificamos si la contraseña es correcta
-        cmd = ['sudo', '-S', 'true']
-        process = subprocess.Popen(
-            cmd, 
-            stdin=subprocess.PIPE, 
-            stdout=subprocess.PIPE, 
-            stderr=subprocess.PIPE
+        # Verificamos si la contraseña es correcta (-v valida sin ejecutar otro binario)
+        result = subprocess.run(
+            ['sudo', '-S', '-v', '-p', ''],
+            input=password.encode() + b'\n',
+            capture_output=True,
+            timeout=10
         )
-        output, error = process.communicate(input=password.encode())
         
-        if process.returncode == 0:
+        if result.returncode == 0:
+            _sudo_validated = True
             TerminalManager.clear_screen()
             return True
         else:
@@ -54,45 +60,58 @@ def get_sudo_permission():
 
 def setup_environment():
     """Configura el entorno para el framework"""
-    # Configurar el manejador de señal para Ctrl+C
-    signal.signal(signal.SIGINT, signal_handler)
-    
     # Añadir el directorio actual al PYTHONPATH
-    root_dir = Path(__file__).parent
-    sys.path.append(str(root_dir))
+    root_dir = _ROOT_DIR
+    if root_dir not in sys.path:
+        sys.path.append(root_dir)
     
     # Crear directorios necesarios si no existen
     try:
-        (root_dir / 'modules').mkdir(exist_ok=True)
-        (root_dir / 'core').mkdir(exist_ok=True)
-        (root_dir / 'cache').mkdir(exist_ok=True)
+        # Un único listado del directorio raíz dice qué falta: el directorio solo
+        # se crea si no aparece, y los paquetes reciben su __init__.py si no lo tienen
+        with os.scandir(root_dir) as it:
+            root_entries = {entry.name for entry in it}
+        if '__init__.py' not in root_entries:
+            open(os.path.join(root_dir, '__init__.py'), 'a').close()
+        for name, is_package in (('core', True), ('modules', True), ('cache', False)):
+            dir_path = os.path.join(root_dir, name)
+            created = name not in root_entries
+            if created:
+                os.mkdir(dir_path)
+            if is_package:
+                init_file = os.path.join(dir_path, '__init__.py')
+                if created or not os.path.exists(init_file):
+                    open(init_file, 'a').close()
+
+    except PermissionError:
+        print(f"{Colors.FAIL}[!] No enough permissions to create directories{Colors.ENDC}")
+        return False
+    except Exception as e:
+        print(f"{Colors.FAIL}[!] Error setting up environment: {e}{Colors.ENDC}")
+        return False
         
-        # Crear archivos __init__.py si no existen
-        for dir_path in [root_dir, root_dir / 'core', root_dir / 'modules']:
-            dir_path.mkdir(exist_ok=True)
-            init_file = dir_path / '__init__.py'
-            if not init_file.exists():
-                init_file.touch()
-                
-        # Update modules cache if needed
+    return True
+
+def update_modules_cache():
+    """Actualiza la caché de módulos de la tienda si ha caducado"""
+    try:
         from core.module_cache import ModuleCache
         repo_url = "https://github.com/CoreSecFrame/CoreSecFrame-Modules"  # Default repository URL
         
-        if ModuleCache.needs_update():
-            ModuleCache.update_cache(repo_url=repo_url)
+        # Sin red se sigue con la caché anterior, update_cache ya muestra el error
+        if ModuleCache.needs_update() and not ModuleCache.update_cache(repo_url=repo_url):
+            print(f"{Colors.WARNING}[!] Modules cache could not be updated, the shop may list outdated modules{Colors.ENDC}")
             
-    except PermissionError:
-        print(f"{Colors.FAIL}[!] No enough permissions to create directories{Colors.ENDC}")
-        return False
     except Exception as e:
-        print(f"{Colors.FAIL}[!] Error setting up environment: {e}{Colors.ENDC}")
+        print(f"{Colors.FAIL}[!] Error updating modules cache: {e}{Colors.ENDC}")
         return False
         
     return True
     
 def main():
     """Main entry point for the framework"""
-    from core.terminal_management import TerminalManager
+    # Configurar el manejador de señal para Ctrl+C antes de cualquier trabajo lento
+    signal.signal(signal.SIGINT, signal_handler)
     
     # Verify root privileges
     if not get_sudo_permission():
@@ -103,9 +122,11 @@ def main():
         sys.exit(1)
     
     try:
-        from core.framework_interface import FrameworkInterface
         from core.base import ToolModule
         
+        if not update_modules_cache():
+            sys.exit(1)
+        
         # Check module compatibility before loading
         compatibility_status = ToolModule.check_module_compatibility()
         
@@ -149,6 +170,7 @@ def main():
         
         # Clear screen only after user has seen all messages and decided to continue
         TerminalManager.clear_screen()
+        from core.framework_interface import FrameworkInterface
         framework = FrameworkInterface()
         framework.cmdloop()
         